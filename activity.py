@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from scoring import quantile_cdf
+
+
+# Activity levels and the locations.csv weekly count thresholds that separate them
+ACTIVITY_LEVELS = ["Low", "Moderate", "High", "Very High"]
+ACTIVITY_THRESHOLDS = ["count_rate1", "count_rate3", "count_rate5"]
+
+
+def location_table(locations, cube_locations):
+    """locations.csv rows aligned to the cube's location axis (NaN rows for unknown codes)"""
+    locations = locations.assign(location=locations.location.astype(str).str.zfill(2))
+    return locations.set_index("location").reindex(cube_locations)
+
+
+def location_thresholds(locations, cube_locations):
+    """location x ACTIVITY_THRESHOLDS weekly counts aligned to the cube's location axis"""
+    return location_table(locations, cube_locations)[ACTIVITY_THRESHOLDS].to_numpy(dtype=np.float64)
+
+
+def level_probabilities(values, quantiles, thresholds):
+    """Probability of each activity level from quantile forecasts.
+
+    values is (..., location, horizon, quantile) with quantiles ascending
+    and thresholds is (location x len(ACTIVITY_THRESHOLDS)). Returns
+    (..., location, horizon, level); NaN where the forecast or the
+    location's thresholds are missing.
+    """
+    cdf = np.zeros(values.shape[:-1] + (thresholds.shape[1] + 2,))
+    cdf[..., -1] = 1
+    for k in range(thresholds.shape[1]):
+        # P(Y < threshold), broadcast over the horizon axis
+        cdf[..., k + 1] = quantile_cdf(values, quantiles, thresholds[:, k][:, None])
+    probabilities = np.diff(cdf, axis=-1)
+    missing = np.isnan(values).any(axis=-1) | np.isnan(thresholds).any(axis=-1)[:, None]
+    probabilities[missing] = np.nan
+    return probabilities
+
+
+def activity_index(cube, thresholds):
+    """Level probabilities for every (model, reference_date, location, horizon) of the cube.
+
+    Computed once when the cube is built; status lookups and rankings then
+    index this array instead of reading quantiles.
+    """
+    return level_probabilities(cube.values, cube.quantiles, thresholds).astype(np.float32)
+
+
+def next_week_probabilities(cube, r):
+    """model x location x level probabilities on reference date position r.
+
+    Uses each forecast's first horizon with a median, the same horizon as
+    the summary's next_week.
+    """
+    q_median = cube.quantile_index([0.5])[0]
+    valid = ~np.isnan(cube.values[:, r, :, :, q_median])
+    first = np.argmax(valid, axis=-1)[..., None, None]
+    probabilities = np.take_along_axis(cube.activity[:, r], first, axis=-2)[..., 0, :]
+    return np.where(valid.any(axis=-1)[..., None], probabilities, np.nan)
+
+
+def most_likely_level(probabilities):
+    """Index of the most probable level, -1 where the probabilities are missing"""
+    missing = np.isnan(probabilities).any(axis=-1)
+    return np.where(missing, -1, np.argmax(np.nan_to_num(probabilities, nan=-1), axis=-1))
+
+
+def location_activity(ensemble, reference_date, locations):
+    """Next-week median, rate per 100k and activity level of every location on one reference date.
+
+    Reads the ensemble's precomputed summary and activity index for all
+    locations at once. Locations without a forecast have NaN values and an
+    empty level.
+    """
+    table = location_table(locations, ensemble.locations)
+    r = ensemble.position("reference_date", reference_date)
+    n = len(ensemble.locations)
+    if r is None:
+        next_week = np.full(n, np.nan)
+        probabilities = np.full((n, len(ACTIVITY_LEVELS)), np.nan)
+    else:
+        next_week = ensemble.summary[0, r, :, 0].astype(np.float64)
+        probabilities = next_week_probabilities(ensemble, r)[0]
+    levels = most_likely_level(probabilities)
+    population = table["population"].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        "location": ensemble.locations,
+        "location_name": table["location_name"].to_numpy(),
+        "next_week": next_week,
+        "rate_per_100k": next_week / population * 1e5,
+        "level": levels,
+        "activity": np.array(ACTIVITY_LEVELS + [""], dtype=object)[levels],
+        "probability": np.take_along_axis(probabilities, np.maximum(levels, 0)[:, None], axis=-1)[:, 0],
+    })
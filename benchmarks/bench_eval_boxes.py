@@ -0,0 +1,96 @@
+"""Build time and JSON payload of the Evaluations page interval boxes:
+one shape + one trace per box versus the batched two-trace path.
+
+Run from the repository root:
+
+    python benchmarks/bench_eval_boxes.py --location US
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import plotly.graph_objects as go
+
+from forecast_cube import build_cube
+from forecast_store import load_forecasts, sync_store
+from funcs import interval_box_traces
+
+BOX_COLOR = 'rgba(37, 99, 235, 0.16)'
+LINE_COLOR = 'rgba(37, 99, 235, 0.6)'
+
+
+def loop_figure(target_dates, lower, upper, median):
+    """The per-row path the Evaluations page used before batching"""
+    fig = go.Figure()
+    for target_date, lo, hi, med in zip(target_dates, lower, upper, median):
+        if np.isnan(lo) or np.isnan(hi) or np.isnan(med):
+            continue
+        fig.add_shape(
+            type="rect",
+            x0=target_date - timedelta(days=2),
+            x1=target_date + timedelta(days=2),
+            y0=lo,
+            y1=hi,
+            fillcolor=BOX_COLOR,
+            line=dict(color=LINE_COLOR, width=1),
+            layer="below"
+        )
+        fig.add_trace(go.Scatter(
+            x=[target_date - timedelta(days=2), target_date + timedelta(days=2)],
+            y=[med, med],
+            mode='lines',
+            line=dict(color='black', width=1),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+    return fig
+
+
+def batched_figure(target_dates, lower, upper, median):
+    fig = go.Figure()
+    fig.add_traces(interval_box_traces(target_dates, lower, upper, median, BOX_COLOR, LINE_COLOR))
+    return fig
+
+
+def measure(build, inputs, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = sum(len(build(*args).to_json()) for args in inputs)
+        times.append(time.perf_counter() - start)
+    return min(times), payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--location", default="US")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sync_store()
+    cube = build_cube(load_forecasts(start_date="2024-09-30"))
+    q_lower, q_median, q_upper = cube.quantile_index([0.025, 0.5, 0.975])
+
+    # One figure per (model, horizon), as the page draws them
+    inputs = []
+    for model in cube.models:
+        for horizon in [0, 1, 2, 3]:
+            series = cube.horizon_series(model, args.location, horizon)
+            target_dates = cube.reference_dates + timedelta(weeks=horizon)
+            inputs.append((target_dates, series[:, q_lower], series[:, q_upper], series[:, q_median]))
+    boxes = sum(int((~np.isnan(i[1])).sum()) for i in inputs)
+
+    print(f"{len(inputs)} figures, {boxes} boxes at {args.location}")
+    print(f"{'path':>8} {'build+serialize (ms)':>21} {'payload (KB)':>13}")
+    for name, build in [("loop", loop_figure), ("batched", batched_figure)]:
+        elapsed, payload = measure(build, inputs, args.repeat)
+        print(f"{name:>8} {elapsed * 1000:>21.1f} {payload / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Wall-clock time of forecast CSV parsing, validation and store ingestion by worker count.
+
+Run from the repository root:
+
+    python benchmarks/bench_ingest.py --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from glob import glob as lsfiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_store import (FORECASTS_DIR, ingest_forecasts, known_locations, read_forecast_files, read_hub_csv,
+                            validate_forecasts)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def validate_all(frames, locations):
+    for path, df in frames:
+        validate_forecasts(df, path, locations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forecasts-dir", default=FORECASTS_DIR)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(lsfiles(os.path.join(args.forecasts_dir, "*", "*.csv")))
+    size_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+    print(f"{len(paths)} files, {size_mb:.1f} MB, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'read (s)':>10} {'speedup':>8} {'ingest (s)':>11} {'speedup':>8}")
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        read_time = best_of(lambda: read_forecast_files(paths, workers=workers), args.repeat)
+        with tempfile.TemporaryDirectory() as store_dir:
+            ingest_time = best_of(
+                lambda: ingest_forecasts(args.forecasts_dir, store_dir, workers=workers), args.repeat)
+        if baseline is None:
+            baseline = (read_time, ingest_time)
+        print(f"{workers:>8} {read_time:>10.3f} {baseline[0] / read_time:>7.2f}x "
+              f"{ingest_time:>11.3f} {baseline[1] / ingest_time:>7.2f}x")
+
+    # Validation alone, on files already read, in one process
+    frames = [(path, read_hub_csv(path)) for path in paths]
+    locations = known_locations()
+    validate_time = best_of(lambda: validate_all(frames, locations), args.repeat)
+    print(f"validation: {validate_time:.3f} s single-process "
+          f"({validate_time / len(paths) * 1e3:.1f} ms/file, {validate_time / baseline[1]:.0%} of 1-worker ingest)")
+
+
+if __name__ == "__main__":
+    main()
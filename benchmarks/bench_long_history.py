@@ -0,0 +1,79 @@
+"""Dashboard figure payload and build time in long-history mode versus full SVG traces.
+
+Compares the full observed history of a location, and a synthetic multi-year
+daily series, drawn as plain Scatter traces with list data against the
+LTTB-downsampled Scattergl mode with typed arrays.
+
+Run from the repository root:
+
+    python benchmarks/bench_long_history.py --location US --max-points 100 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from figures import THEMES, build_dashboard_figure
+from forecast_cube import build_cube
+from forecast_store import FORECAST_START_DATE, load_forecasts, read_target_data, sync_store
+
+
+def synthetic_history(df_state_target, years):
+    """Daily series over the given number of years, ending at the last observation"""
+    end = df_state_target['date'].max()
+    dates = pd.date_range(end=end, periods=365 * years, freq="D")
+    season = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365.25).clip(0) ** 4
+    noise = np.random.default_rng(0).normal(0, 0.05, len(dates))
+    scale = df_state_target['value'].max()
+    return pd.DataFrame({"date": dates, "value": (scale * (season + noise)).clip(0).round()})
+
+
+def measure(build, repeat):
+    times, fig = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build()
+        times.append(time.perf_counter() - start)
+    payload = fig.to_json()
+    points = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+    return min(times), len(payload), points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--location", default="US")
+    parser.add_argument("--max-points", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--years", type=int, default=10, help="length of the synthetic daily series")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sync_store()
+    cube = build_cube(load_forecasts(start_date=FORECAST_START_DATE))
+    df_target = read_target_data()
+    full_history = df_target[df_target.location == args.location]
+    ref_date = cube.available_dates(args.location, cube.models)[-1]
+
+    print(f"{'series':<26} {'mode':<16} {'points':>7} {'payload':>11} {'reduction':>10} {'build (ms)':>11}")
+    for name, history in [(f"{args.location} weekly history", full_history),
+                          (f"synthetic {args.years}y daily", synthetic_history(full_history, args.years))]:
+        def build(max_points):
+            return build_dashboard_figure(cube, args.location, cube.models, ref_date, history,
+                                          THEMES['light'], max_points=max_points)
+
+        seconds, baseline, points = measure(lambda: build(len(history)), args.repeat)
+        print(f"{name:<26} {'full (SVG)':<16} {points:>7,} {baseline:>11,} {'':>10} {seconds * 1000:>11.1f}")
+        for max_points in args.max_points:
+            if max_points >= len(history):
+                continue
+            seconds, payload, points = measure(lambda: build(max_points), args.repeat)
+            print(f"{'':<26} {f'LTTB {max_points} (GL)':<16} {points:>7,} {payload:>11,} "
+                  f"{1 - payload / baseline:>9.0%} {seconds * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Headless render sweep of both pages with regression checks.
+
+Drives multi-page.py through Streamlit's AppTest over every state, every
+non-empty subset of the swept models and every reference date on the
+Dashboard slider, and every state, swept model and horizon 0-3 on the
+Evaluations page. The swept models are the app's default selection, or
+--models; subsets grow as 2^n, so keep the list short. Each rerun
+records its latency, the bytes of Plotly JSON sent to the browser and the
+peak Python heap allocated during the rerun (tracemalloc, so latencies are
+comparable between runs of this script rather than with production).
+
+A last pass renders each page and state once more in the dark theme, which
+no earlier view used, and then reruns it: the first render misses the
+figure cache and the rerun hits it. Both record the time spent getting the
+figures and drawing them with st.plotly_chart, from the app's timing spans.
+
+Run from the repository root:
+
+    python benchmarks/bench_pages.py --output bench_pages.json
+    python benchmarks/bench_pages.py --baseline bench_pages.json --max-dates 4
+    python benchmarks/bench_pages.py --models MOBS-GLEAM_FLUH NEU_ISI-FluBcast
+
+With --baseline the run exits non-zero when p50/p95 latency or peak memory
+of a page grows by more than its threshold, or any view's payload does.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "multi-page.py")
+
+
+def measure(at, page, **view):
+    """Rerun the app once and record latency, payload and peak memory for the view"""
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    at.run()
+    latency = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    if len(at.exception):
+        raise RuntimeError(f"{page} {view} raised: {at.exception[0].value}")
+    return {
+        "page": page,
+        **view,
+        "latency_s": latency,
+        "payload_bytes": sum(len(chart.proto.spec) for chart in at.get("plotly_chart")),
+        "peak_bytes": peak,
+    }
+
+
+def evenly_spaced(n, limit):
+    """Up to limit positions out of range(n), always keeping the last (default) one"""
+    if limit is None or n <= limit:
+        return list(range(n))
+    return sorted(set(np.linspace(n - 1, 0, limit).round().astype(int).tolist()))
+
+
+def sweep_dashboard(at, states, models, discovered, max_dates, progress):
+    subsets = [combo for k in range(1, len(models) + 1) for combo in itertools.combinations(models, k)]
+    results = []
+    for state in states:
+        at.selectbox[0].set_value(state)
+        for subset in subsets:
+            # Models outside the sweep stay unticked
+            for model in discovered:
+                at.checkbox(key=f"model_{model}").set_value(model in subset)
+            results.append(measure(at, "Dashboard", state=state, models=list(subset), date=None))
+
+            sliders = [s for s in at.select_slider if s.key == "main_date_slider"]
+            if not sliders:
+                continue
+            options = list(sliders[0].options)
+            for i in evenly_spaced(len(options), max_dates):
+                sliders[0].set_value(i)
+                results.append(measure(at, "Dashboard", state=state, models=list(subset), date=options[i]))
+            # Back to the latest date so the next subset starts from the default view
+            sliders[0].set_value(len(options) - 1)
+        progress(state)
+    return results
+
+
+def sweep_evaluations(at, states, models, progress):
+    at.session_state.current_page = "Evaluations"
+    at.run()
+    results = []
+    for state in states:
+        at.selectbox[0].set_value(state)
+        for model in models:
+            at.radio(key="eval_model_selection").set_value(model)
+            for horizon in range(4):
+                at.session_state.selected_horizon = horizon
+                results.append(measure(at, "Evaluations", state=state, models=[model], horizon=horizon))
+        progress(state)
+    return results
+
+
+def chart_time(log_path):
+    """Seconds the last rerun in the timing log spent getting figures and in st.plotly_chart, and its cache stats"""
+    with open(log_path) as f:
+        record = json.loads(f.readlines()[-1])
+    seconds = sum(r["seconds"] for r in record["spans"] if r["name"] in ("figure", "plotly_chart"))
+    return seconds, record["figure_cache"]
+
+
+def sweep_figure_cache(at, states, pages, progress):
+    """Miss then hit latency of every page and state, measured through st.plotly_chart"""
+    log_path = os.path.join(tempfile.mkdtemp(), "timing.jsonl")
+    os.environ["TIMING_LOG"] = log_path
+    at.session_state.theme = "dark"
+    results = []
+    # The dark theme is unused until here, so the first render of this pass is a miss
+    misses = None
+    try:
+        for page in pages:
+            at.session_state.current_page = page
+            for state in states:
+                at.selectbox[0].set_value(state)
+                for _ in range(2):
+                    at.run()
+                    if len(at.exception):
+                        raise RuntimeError(f"{page} {state} raised: {at.exception[0].value}")
+                    seconds, stats = chart_time(log_path)
+                    cache = "miss" if misses is None or stats["misses"] > misses else "hit"
+                    misses = stats["misses"]
+                    results.append({"page": page, "state": state, "cache": cache, "chart_s": seconds})
+            progress(page)
+    finally:
+        del os.environ["TIMING_LOG"]
+        at.session_state.theme = "light"
+    return results
+
+
+def summarize_figure_cache(results):
+    """p50 chart time of cache misses and hits per page"""
+    summary = {}
+    for page in sorted({r["page"] for r in results}):
+        summary[page] = {}
+        for cache in ("miss", "hit"):
+            seconds = [r["chart_s"] for r in results if r["page"] == page and r["cache"] == cache]
+            summary[page][f"{cache}_views"] = len(seconds)
+            summary[page][f"p50_{cache}_s"] = float(np.percentile(seconds, 50)) if seconds else None
+    return summary
+
+
+def summarize(results):
+    pages = {}
+    for page in sorted({r["page"] for r in results}):
+        rows = [r for r in results if r["page"] == page]
+        latency = np.array([r["latency_s"] for r in rows])
+        pages[page] = {
+            "views": len(rows),
+            "p50_latency_s": float(np.percentile(latency, 50)),
+            "p95_latency_s": float(np.percentile(latency, 95)),
+            "max_latency_s": float(latency.max()),
+            "mean_payload_bytes": float(np.mean([r["payload_bytes"] for r in rows])),
+            "max_payload_bytes": int(max(r["payload_bytes"] for r in rows)),
+            "max_peak_bytes": int(max(r["peak_bytes"] for r in rows)),
+        }
+    return pages
+
+
+def view_key(result):
+    return (result["page"], result["state"], tuple(result["models"]), result.get("date"), result.get("horizon"))
+
+
+def regressions(current, baseline, thresholds):
+    """Messages for every metric that grew past its threshold relative to the baseline"""
+    failures = []
+    for page, summary in current["summary"].items():
+        before = baseline["summary"].get(page)
+        if before is None:
+            continue
+        for metric, limit in [("p50_latency_s", thresholds["latency"]),
+                              ("p95_latency_s", thresholds["latency"]),
+                              ("max_peak_bytes", thresholds["memory"])]:
+            if before[metric] > 0 and summary[metric] > before[metric] * (1 + limit):
+                failures.append(f"{page} {metric}: {before[metric]:.4g} -> {summary[metric]:.4g} "
+                                f"(+{summary[metric] / before[metric] - 1:.0%}, limit +{limit:.0%})")
+
+    # Payloads are deterministic, so they are compared view by view
+    before_payload = {view_key(r): r["payload_bytes"] for r in baseline["results"]}
+    for result in current["results"]:
+        before = before_payload.get(view_key(result))
+        if before and result["payload_bytes"] > before * (1 + thresholds["payload"]):
+            failures.append(f"{' / '.join(str(k) for k in view_key(result) if k is not None)} payload: "
+                            f"{before:,} -> {result['payload_bytes']:,} bytes")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_pages.json")
+    parser.add_argument("--baseline", help="earlier --output file to check for regressions against")
+    parser.add_argument("--states", nargs="+", help="limit the sweep to these states")
+    parser.add_argument("--models", nargs="+", help="sweep these models instead of the default selection")
+    parser.add_argument("--max-dates", type=int, help="sample at most this many slider dates per view")
+    parser.add_argument("--pages", nargs="+", default=["Dashboard", "Evaluations"])
+    parser.add_argument("--max-latency-regression", type=float, default=0.25)
+    parser.add_argument("--max-payload-regression", type=float, default=0.05)
+    parser.add_argument("--max-memory-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    at = AppTest.from_file(APP, default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    startup = time.perf_counter() - start
+
+    states = args.states or list(at.selectbox[0].options)
+    checkboxes = [c for c in at.checkbox if c.key and c.key.startswith("model_")]
+    discovered = [c.key[len("model_"):] for c in checkboxes]
+    models = args.models or [c.key[len("model_"):] for c in checkboxes if c.value]
+    unknown = sorted(set(models) - set(discovered))
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)} (discovered: {', '.join(discovered)})")
+    print(f"first render {startup:.2f} s; sweeping {len(states)} states, {len(models)} of {len(discovered)} models")
+
+    def progress(state):
+        print(f"  {state}", file=sys.stderr)
+
+    tracemalloc.start()
+    results = []
+    if "Dashboard" in args.pages:
+        results += sweep_dashboard(at, states, models, discovered, args.max_dates, progress)
+    if "Evaluations" in args.pages:
+        results += sweep_evaluations(at, states, models, progress)
+    tracemalloc.stop()
+    cache_results = sweep_figure_cache(at, states, args.pages, progress)
+
+    report = {"startup_s": startup, "summary": summarize(results), "results": results,
+              "figure_cache": {"summary": summarize_figure_cache(cache_results), "results": cache_results}}
+    print(f"{'page':<12} {'views':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} "
+          f"{'mean payload':>13} {'peak heap (MB)':>15}")
+    for page, s in report["summary"].items():
+        print(f"{page:<12} {s['views']:>6} {s['p50_latency_s'] * 1000:>9.1f} {s['p95_latency_s'] * 1000:>9.1f} "
+              f"{s['max_latency_s'] * 1000:>9.1f} {s['mean_payload_bytes']:>13,.0f} {s['max_peak_bytes'] / 1e6:>15.1f}")
+    print(f"{'page':<12} {'figures + st.plotly_chart p50 (ms): miss':>42} {'hit':>8}")
+    for page, s in report["figure_cache"]["summary"].items():
+        miss, hit = (f"{s[k] * 1000:.1f}" if s[k] is not None else "-" for k in ("p50_miss_s", "p50_hit_s"))
+        print(f"{page:<12} {miss:>42} {hit:>8}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = regressions(report, baseline, {
+            "latency": args.max_latency_regression,
+            "payload": args.max_payload_regression,
+            "memory": args.max_memory_regression,
+        })
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
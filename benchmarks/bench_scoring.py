@@ -0,0 +1,47 @@
+"""Throughput of the vectorized WIS / WIS_ratio / MAPE scoring engine.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_cube import build_cube
+from forecast_store import load_forecasts, read_target_data, sync_store
+from scoring import score_forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start-date", default="2024-09-30")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sync_store()
+    df_forecasts = load_forecasts(start_date=args.start_date)
+    df_target_data = read_target_data()
+
+    start = time.perf_counter()
+    cube = build_cube(df_forecasts)
+    cube_time = time.perf_counter() - start
+
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        df_scores = score_forecasts(cube, df_target_data)
+        times.append(time.perf_counter() - start)
+    best = min(times)
+
+    tasks = (df_scores['score'] == 'WIS').sum()
+    print(f"cube: {cube.values.shape} built in {cube_time * 1000:.1f} ms")
+    print(f"scored {tasks:,} tasks ({len(df_scores):,} score rows) in {best * 1000:.1f} ms")
+    print(f"throughput: {tasks / best:,.0f} tasks/s, {len(df_forecasts) / best:,.0f} quantile rows/s")
+
+
+if __name__ == "__main__":
+    main()
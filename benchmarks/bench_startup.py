@@ -0,0 +1,60 @@
+"""Time to first render of the Dashboard page in a fresh process, with the
+geospatial stack loaded lazily (default) or eagerly (PRELOAD_GEOMETRY=1).
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+print(json.dumps({
+    "render_s": time.perf_counter() - start,
+    "geopandas_loaded": "geopandas" in sys.modules,
+    "errors": len(at.exception),
+}))
+"""
+
+
+def run_once(preload):
+    env = dict(os.environ, PRELOAD_GEOMETRY="1" if preload else "0")
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, os.path.join(ROOT, "multi-page.py")],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Warm the forecast store and score cache so both modes start from the same disk state
+    run_once(preload=False)
+
+    print(f"{'mode':>6} {'first render (s)':>17} {'process (s)':>12} {'geopandas loaded':>17}")
+    for name, preload in [("lazy", False), ("eager", True)]:
+        results = [run_once(preload) for _ in range(args.repeat)]
+        best = min(results, key=lambda r: r["render_s"])
+        if any(r["errors"] for r in results):
+            print(f"{name}: page raised an exception", file=sys.stderr)
+        print(f"{name:>6} {best['render_s']:>17.2f} {best['process_s']:>12.2f} {str(best['geopandas_loaded']):>17}")
+
+
+if __name__ == "__main__":
+    main()
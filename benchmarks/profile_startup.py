@@ -0,0 +1,183 @@
+"""Cold-start profile of the dashboard: per-import, per-file and per-stage timings.
+
+Imports are timed in a fresh interpreter with -X importtime, the load path is
+replayed in-process with timing spans enabled, and the first headless render
+of multi-page.py is timed in its own process. The breakdown is printed and
+written as JSON.
+
+Run from the repository root:
+
+    python benchmarks/profile_startup.py --output startup_report.json
+    python benchmarks/profile_startup.py --cold     # empty store and score cache
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from glob import glob as lsfiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules multi-page.py pulls in before it renders anything
+APP_IMPORTS = ["streamlit", "plotly.graph_objects", "pandas", "numpy", "pyarrow.dataset",
+               "funcs", "forecast_store", "forecast_cube", "scoring", "figure_cache"]
+
+RENDER_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+print(json.dumps({
+    "render_s": time.perf_counter() - start,
+    "errors": [e.value for e in at.exception],
+    "loaded": sorted(m for m in ("geopandas", "shapely", "plotly.express") if m in sys.modules),
+}))
+"""
+
+
+def profile_imports(modules):
+    """Self and cumulative import time of every module, from -X importtime"""
+    code = "; ".join(f"import {m}" for m in modules)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_s": int(self_us) / 1e6,
+            "cumulative_s": int(cumulative_us) / 1e6,
+        })
+    return rows
+
+
+def profile_stages(func):
+    """Run func with timing spans enabled and return its spans and wall time"""
+    from timing import start_recording, stop_recording
+
+    start_recording()
+    start = time.perf_counter()
+    try:
+        func()
+    finally:
+        elapsed = time.perf_counter() - start
+        records = stop_recording()
+    return {"seconds": elapsed, "spans": records}
+
+
+def stage_totals(records):
+    totals = defaultdict(float)
+    for record in records:
+        totals[record["name"]] += record["seconds"]
+    return dict(totals)
+
+
+def file_totals(records):
+    """Per-file time split by stage, slowest files first"""
+    files = defaultdict(lambda: defaultdict(float))
+    for record in records:
+        if "file" in record:
+            files[record["file"]][record["name"]] += record["seconds"]
+    rows = [{"file": path, "total_s": sum(stages.values()), **stages} for path, stages in files.items()]
+    return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+
+def profile_load(store_root, start_date):
+    """Replay the app's load path stage by stage"""
+    from forecast_store import FORECASTS_DIR, TARGET_PATH, load_forecasts, read_forecast_files, read_target_data, sync_store
+    from forecast_cube import build_cube
+    from scoring import update_scores
+
+    store_dir = os.path.join(store_root, "forecasts")
+    manifest_path = os.path.join(store_root, "manifest.json")
+    score_dir = os.path.join(store_root, "scores")
+    paths = sorted(lsfiles(os.path.join(FORECASTS_DIR, "*", "*.csv")))
+    state = {}
+
+    def step(name, func):
+        result = profile_stages(lambda: state.__setitem__(name, func()))
+        result["totals"] = stage_totals(result["spans"])
+        return result
+
+    return {
+        # Parsing every CSV directly, one worker so each file's stages are recorded here
+        "csv": step("csv", lambda: read_forecast_files(paths, workers=1, start_date=start_date)),
+        "target": step("target", lambda: read_target_data(TARGET_PATH)),
+        "sync_store": step("sync", lambda: sync_store(FORECASTS_DIR, store_dir, manifest_path, workers=1)),
+        "load_forecasts": step("df", lambda: load_forecasts(start_date=start_date, store_dir=store_dir)),
+        "build_cube": step("cube", lambda: build_cube(state["df"])),
+        "update_scores": step("scores", lambda: update_scores(state["cube"], state["target"], score_dir, manifest_path)),
+    }
+
+
+def profile_render():
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", RENDER_CHILD, os.path.join(ROOT, "multi-page.py")],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def print_report(report, top):
+    imports = report["imports"]
+    print(f"Imports ({sum(r['self_s'] for r in imports):.2f} s total)")
+    for row in sorted((r for r in imports if r["depth"] == 0), key=lambda r: r["cumulative_s"], reverse=True)[:top]:
+        print(f"  {row['module']:<40} {row['cumulative_s']:>8.3f} s")
+
+    print("\nLoad stages")
+    for step, result in report["load"].items():
+        print(f"  {step:<40} {result['seconds']:>8.3f} s")
+        for name, seconds in sorted(result["totals"].items(), key=lambda kv: kv[1], reverse=True):
+            print(f"    {name:<38} {seconds:>8.3f} s")
+
+    print("\nSlowest files")
+    for row in report["files"][:top]:
+        stages = "  ".join(f"{k} {v:.3f}" for k, v in row.items() if k not in ("file", "total_s"))
+        print(f"  {row['file']:<60} {row['total_s']:>7.3f} s  ({stages})")
+
+    if "render" in report:
+        render = report["render"]
+        print(f"\nFirst headless render {render['render_s']:.2f} s (process {render['process_s']:.2f} s), "
+              f"lazy modules loaded: {render['loaded'] or 'none'}")
+        for error in render["errors"]:
+            print(f"  page raised: {error}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="startup_report.json")
+    parser.add_argument("--start-date", default="2024-09-30")
+    parser.add_argument("--cold", action="store_true", help="profile against an empty store and score cache")
+    parser.add_argument("--no-render", action="store_true", help="skip the headless AppTest render")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Paths match the app's so the warm store's manifest is reused as-is
+    output = os.path.abspath(args.output)
+    os.chdir(ROOT)
+    report = {"python": sys.version.split()[0], "cpus": os.cpu_count(), "cold": args.cold}
+    report["imports"] = profile_imports(APP_IMPORTS)
+    with tempfile.TemporaryDirectory() as tmp:
+        store_root = tmp if args.cold else "store"
+        report["load"] = profile_load(store_root, args.start_date)
+    report["files"] = file_totals(span for step in report["load"].values() for span in step["spans"])
+    if not args.no_render:
+        report["render"] = profile_render()
+
+    print_report(report, args.top)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import numpy as np
+
+from scoring import observed_for_cube, quantile_cdf
+
+
+# Nominal coverage of the central prediction intervals that are checked
+COVERAGE_LEVELS = [0.5, 0.8, 0.9, 0.95, 0.98]
+
+PIT_BINS = 10
+
+
+class CalibrationCube:
+    """Interval coverage and PIT of every forecast, on the forecast cube's axes.
+
+    values is model x reference_date x location x horizon x (COVERAGE_LEVELS + PIT):
+    the first channels are 1 where the observation fell inside that central
+    interval and 0 where it did not, the last is the PIT value. Tasks without
+    a forecast or an observation are NaN, so any selection reduces with
+    nanmean / histogram without going back to the quantiles.
+    """
+
+    def __init__(self, values, cube):
+        self.values = values
+        self.cube = cube
+
+    @property
+    def coverage(self):
+        return self.values[..., :len(COVERAGE_LEVELS)]
+
+    @property
+    def pit(self):
+        return self.values[..., len(COVERAGE_LEVELS)]
+
+    def selection(self, location=None, horizon=None):
+        """Positional selectors for one location and/or horizon (all when None)"""
+        loc = slice(None) if location is None else self.cube.position("location", location)
+        h = slice(None) if horizon is None else self.cube.position("horizon", horizon)
+        return loc, h
+
+    def coverage_curve(self, location=None, horizon=None):
+        """model x COVERAGE_LEVELS empirical coverage, and the number of scored tasks per model"""
+        loc, h = self.selection(location, horizon)
+        if loc is None or h is None:
+            n = len(self.cube.models)
+            return np.full((n, len(COVERAGE_LEVELS)), np.nan), np.zeros(n, dtype=int)
+        covered = self.coverage[:, :, loc, h].reshape(len(self.cube.models), -1, len(COVERAGE_LEVELS))
+        counts = (~np.isnan(covered[..., 0])).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.nansum(covered, axis=1) / counts[:, None], counts
+
+    def coverage_by_location(self, model, level):
+        """location x horizon empirical coverage of one model's interval at level"""
+        m = self.cube.position("model", model)
+        covered = self.coverage[m, ..., COVERAGE_LEVELS.index(level)]
+        counts = (~np.isnan(covered)).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, np.nansum(covered, axis=0) / counts, np.nan)
+
+    def pit_histogram(self, model, location=None, horizon=None, bins=PIT_BINS):
+        """Share of one model's PIT values in each of bins equal-width bins"""
+        m = self.cube.position("model", model)
+        loc, h = self.selection(location, horizon)
+        if m is None or loc is None or h is None:
+            return np.full(bins, np.nan)
+        pit = np.ravel(self.pit[m, :, loc, h])
+        pit = pit[~np.isnan(pit)]
+        counts, _ = np.histogram(pit, bins=bins, range=(0, 1))
+        return counts / len(pit) if len(pit) else np.full(bins, np.nan)
+
+
+def central_interval_index(cube, level):
+    """Positions of the lower and upper quantiles of the central interval at level"""
+    return cube.quantile_index([round((1 - level) / 2, 4), round(1 - (1 - level) / 2, 4)])
+
+
+def build_calibration(cube, df_target_data):
+    """Coverage of every central interval and mid-PIT for every task, in one pass over the cube.
+
+    PIT is the midpoint of P(Y < y) and P(Y <= y) so ties between the
+    observation and several quantiles of a small count are not pushed to
+    one side.
+    """
+    observed = observed_for_cube(cube, df_target_data)[None]       # 1 x R x L x H
+    values = cube.values                                            # M x R x L x H x Q
+    missing = np.isnan(values).any(axis=-1) | np.isnan(observed)
+
+    out = np.empty(values.shape[:4] + (len(COVERAGE_LEVELS) + 1,), dtype=np.float32)
+    for i, level in enumerate(COVERAGE_LEVELS):
+        lower, upper = central_interval_index(cube, level)
+        out[..., i] = (values[..., lower] <= observed) & (observed <= values[..., upper])
+    out[..., -1] = (quantile_cdf(values, cube.quantiles, observed, side="left")
+                    + quantile_cdf(values, cube.quantiles, observed, side="right")) / 2
+    out[missing] = np.nan
+    return CalibrationCube(out, cube)
@@ -0,0 +1,91 @@
+import itertools
+import warnings
+
+import numpy as np
+
+from activity import activity_index
+from forecast_cube import ForecastCube
+
+
+# Ensemble methods and their display names
+ENSEMBLE_METHODS = {"mean": "Mean", "median": "Median", "weighted": "Skill-weighted"}
+
+
+def model_subsets(models):
+    """Every non-empty subset of models, as frozensets"""
+    return [frozenset(combo) for k in range(1, len(models) + 1) for combo in itertools.combinations(models, k)]
+
+
+def skill_weights(df_scores, models, score="WIS"):
+    """Per-model weights proportional to 1 / mean score, normalized to sum to 1.
+
+    Means are taken over the (location, reference_date, horizon) tasks every
+    model forecast so no model is rewarded for skipping hard weeks. Models
+    without scores share the weight equally when nothing else is known.
+    """
+    df = df_scores[(df_scores['score'] == score) & df_scores['Model'].isin(models)]
+    wide = df.pivot_table(index=['location', 'reference_date', 'horizon'], columns='Model',
+                          values='value', aggfunc='first')
+    common = wide.dropna()
+    mean_score = (common if len(common) > 0 else wide).mean()
+    skill = (1 / mean_score.where(mean_score > 0)).reindex(models).fillna(0).to_numpy()
+    if skill.sum() == 0:
+        skill = np.ones(len(models))
+    return dict(zip(models, skill / skill.sum()))
+
+
+def combine_quantiles(values, method="mean", weights=None):
+    """Quantile ensemble over the model axis (0) of model x ... x quantile forecasts.
+
+    mean and weighted average each quantile level (Vincentization); median
+    takes the per-level median. A model only contributes to tasks where it
+    has every quantile, and weights are renormalized over those models.
+    Tasks no model forecast are NaN.
+    """
+    complete = ~np.isnan(values).any(axis=-1, keepdims=True)
+    values = np.where(complete, values, np.nan)
+    with warnings.catch_warnings():
+        # All-NaN tasks are expected and stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if method == "mean":
+            return np.nanmean(values, axis=0)
+        if method == "median":
+            return np.nanmedian(values, axis=0)
+        if method == "weighted":
+            w = np.asarray(weights, dtype=float).reshape((-1,) + (1,) * (values.ndim - 1)) * complete
+            total = w.sum(axis=0)
+            return np.nansum(values * w, axis=0) / np.where(total > 0, total, np.nan)
+    raise ValueError(f"unknown ensemble method: {method}")
+
+
+def ensemble_name(method):
+    return f"Ensemble ({ENSEMBLE_METHODS[method].lower()})"
+
+
+def build_ensembles(cube, method="mean", weights=None, subsets=None, thresholds=None):
+    """Ensemble forecasts for every model subset, each as a single-model ForecastCube.
+
+    Each subset is combined for all reference dates, locations and horizons
+    in one vectorized pass, and its dashboard summary (and activity index,
+    given the location thresholds) is precomputed.
+    Returns {frozenset(models): ForecastCube}.
+    """
+    ensembles = {}
+    for subset in subsets or model_subsets(cube.models):
+        members = [model for model in cube.models if model in subset]
+        m = [cube.index["model"][model] for model in members]
+        w = None if weights is None else [weights.get(model, 0) for model in members]
+        values = combine_quantiles(cube.values[m], method, w).astype(np.float32)
+        ensemble = ForecastCube(
+            values[None],
+            models=[ensemble_name(method)],
+            reference_dates=cube.reference_dates,
+            locations=cube.locations,
+            horizons=cube.horizons,
+            quantiles=cube.quantiles,
+        )
+        ensemble.summary = ensemble.summarize()
+        if thresholds is not None:
+            ensemble.activity = activity_index(ensemble, thresholds)
+        ensembles[frozenset(subset)] = ensemble
+    return ensembles
@@ -0,0 +1,224 @@
+import html
+import itertools
+import json
+import os
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from activity import ACTIVITY_LEVELS, location_thresholds, most_likely_level, next_week_probabilities
+from ensemble import build_ensembles
+from figures import THEMES, build_dashboard_figure, build_evaluation_figures
+from forecast_cube import SUMMARY_FIELDS, build_cube
+from forecast_store import (DEFAULT_WORKERS, FORECAST_START_DATE, LOCATIONS_PATH, MANIFEST_PATH, TARGET_START_DATE,
+                            file_hash, load_forecasts, map_files, read_target_data, sync_store)
+from model_registry import default_models, load_model_registry
+from scoring import SCORES, read_score_cache, update_scores
+
+
+EXPORT_DIR = "static"
+HORIZONS = [0, 1, 2, 3]
+
+# The export scores its own model subset, so it keeps a score cache apart from the app's
+EXPORT_SCORE_CACHE_DIR = "store/export-scores"
+
+# Data shared by the export tasks; each pool worker (started by a forkserver) loads it once
+_data = None
+
+
+def load_export_data(models=None, sync=True, workers=DEFAULT_WORKERS):
+    """The tables the app loads, read through the same store, cube and score code.
+
+    models defaults to the app's default selection from the model registry.
+    """
+    models = default_models(load_model_registry()) if models is None else list(models)
+    if sync:
+        sync_store(workers=workers)
+    cube = build_cube(load_forecasts(models=models, start_date=FORECAST_START_DATE))
+    df_target_all = read_target_data()
+    # Scores are updated by the parent process; workers only read the cache it wrote
+    df_scores = (update_scores(cube, df_target_all, EXPORT_SCORE_CACHE_DIR) if sync
+                 else read_score_cache(EXPORT_SCORE_CACHE_DIR)[0])
+    locations = pd.read_csv(LOCATIONS_PATH, dtype={"location": str})
+    thresholds = location_thresholds(locations, cube.locations)
+    names = dict(zip(locations.location, locations.location_name))
+    names["US"] = "United States"
+    return {
+        "models": models,
+        "cube": cube,
+        # The app's default ensemble, for the metrics and the band of multi-model views
+        "ensembles": build_ensembles(cube, "mean", thresholds=thresholds),
+        "df_target_data": df_target_all[df_target_all.date >= pd.to_datetime(TARGET_START_DATE)],
+        "df_scores": df_scores,
+        "names": names,
+    }
+
+
+def export_data(models=None):
+    global _data
+    if _data is None:
+        _data = load_export_data(models, sync=False)
+    return _data
+
+
+def model_sets(models):
+    """Every non-empty subset of the models, in sidebar order"""
+    return [list(combo) for k in range(1, len(models) + 1) for combo in itertools.combinations(models, k)]
+
+
+def html_page(title, subtitle, figures, metrics=None):
+    """Standalone page with the figures and an optional metric table; plotly.js comes from the CDN"""
+    rows = "".join(f"<tr><th>{html.escape(k)}</th><td>{v}</td></tr>" for k, v in (metrics or {}).items())
+    divs = "".join(fig.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False)
+                   for i, fig in enumerate(figures))
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>"
+            f"<body style=\"font-family: sans-serif\"><h1>{html.escape(title)}</h1><p>{html.escape(subtitle)}</p>"
+            f"{f'<table>{rows}</table>' if rows else ''}{divs}</body></html>")
+
+
+def write_view(out_dir, relpath, bundle, figures, page_html, formats):
+    """Write one view's JSON bundle and/or HTML page; returns its manifest entry"""
+    entry = dict(bundle)
+    entry["files"] = {}
+    os.makedirs(os.path.join(out_dir, os.path.dirname(relpath)), exist_ok=True)
+    if "json" in formats:
+        payload = dict(bundle, figures=[json.loads(fig.to_json()) for fig in figures])
+        path = relpath + ".json"
+        with open(os.path.join(out_dir, path), "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        entry["files"]["json"] = path
+    if "html" in formats:
+        path = relpath + ".html"
+        with open(os.path.join(out_dir, path), "w") as f:
+            f.write(page_html)
+        entry["files"]["html"] = path
+    entry["bytes"] = sum(os.path.getsize(os.path.join(out_dir, p)) for p in entry["files"].values())
+    return entry
+
+
+def export_dashboard(location, theme, out_dir, formats, latest_only=False, models=None):
+    """Every (reference_date, model set) Dashboard view for one location"""
+    data = export_data(models)
+    cube, colors = data["cube"], THEMES[theme]
+    df_state_target = data["df_target_data"][data["df_target_data"].location == location]
+    last_observed = float(df_state_target['value'].iloc[-1]) if len(df_state_target) > 0 else None
+    name = data["names"].get(location, location)
+
+    entries = []
+    for models in model_sets(data["models"]):
+        dates = cube.available_dates(location, models)
+        for ref_date in dates[-1:] if latest_only else dates:
+            ensemble = data["ensembles"][frozenset(models)]
+            fig = build_dashboard_figure(cube, location, models, ref_date, df_state_target, colors,
+                                         ensemble=ensemble if len(models) > 1 else None)
+            rows = ensemble.summary_rows(ensemble.models, ref_date, location)
+            metrics = dict(zip(SUMMARY_FIELDS, rows[0].astype(np.float64).round(1).tolist())) if len(rows) else {}
+            metrics["last_observed"] = last_observed
+            if len(rows):
+                probabilities = next_week_probabilities(ensemble, ensemble.position("reference_date", ref_date))
+                probabilities = probabilities[0, ensemble.position("location", location)]
+                level = most_likely_level(probabilities)
+                metrics["activity"] = ACTIVITY_LEVELS[level] if level >= 0 else None
+                metrics["activity_probabilities"] = dict(zip(ACTIVITY_LEVELS, probabilities.astype(np.float64).round(3).tolist()))
+            bundle = {
+                "page": "Dashboard",
+                "location": location,
+                "location_name": name,
+                "reference_date": ref_date.strftime("%Y-%m-%d"),
+                "models": models,
+                "theme": theme,
+                "metrics": metrics,
+            }
+            relpath = os.path.join(theme, "dashboard", location, bundle["reference_date"], "+".join(models))
+            page_html = html_page(f"{name} Influenza Dashboard",
+                                  f"Forecast date {bundle['reference_date']} · {', '.join(models)}", [fig], metrics)
+            entries.append(write_view(out_dir, relpath, bundle, [fig], page_html, formats))
+    return entries
+
+
+def export_evaluations(location, theme, out_dir, formats, latest_only=False, models=None):
+    """Every (model, horizon, score) Evaluations view for one location"""
+    data = export_data(models)
+    name = data["names"].get(location, location)
+
+    entries = []
+    for model, horizon, score in itertools.product(data["models"], HORIZONS, SCORES):
+        figures = build_evaluation_figures(data["cube"], data["df_scores"], data["df_target_data"],
+                                           location, model, horizon, score, THEMES[theme])
+        bundle = {
+            "page": "Evaluations",
+            "location": location,
+            "location_name": name,
+            "models": [model],
+            "horizon": horizon,
+            "score": score,
+            "theme": theme,
+        }
+        relpath = os.path.join(theme, "evaluations", location, model, f"h{horizon}-{score}")
+        page_html = html_page(f"Forecast Evaluations - {name}", f"Model: {model} · Horizon {horizon} · {score}", figures)
+        entries.append(write_view(out_dir, relpath, bundle, figures, page_html, formats))
+    return entries
+
+
+def export_task(task, out_dir, formats, latest_only, models):
+    page, location, theme = task
+    export = export_dashboard if page == "Dashboard" else export_evaluations
+    return export(location, theme, out_dir, formats, latest_only, models)
+
+
+def export_static(out_dir=EXPORT_DIR, pages=("Dashboard", "Evaluations"), themes=("light",),
+                  locations=None, formats=("json", "html"), latest_only=False, workers=DEFAULT_WORKERS,
+                  models=None):
+    """Pre-render views in parallel, one task per (page, location, theme), and write out_dir/manifest.json.
+
+    Dashboard views cover every subset of models, so the default is the
+    app's default selection rather than every hub model.
+    """
+    global _data
+    os.makedirs(out_dir, exist_ok=True)
+    _data = load_export_data(models, workers=workers)
+    locations = locations or _data["cube"].locations
+    tasks = [(page, location, theme) for page in pages for theme in themes for location in locations]
+
+    results = map_files(partial(export_task, out_dir=out_dir, formats=formats, latest_only=latest_only,
+                                models=_data["models"]), tasks, workers)
+    views = [entry for entries in results for entry in entries]
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        # Changes whenever a forecast file does, so a server can tell the bundles are stale
+        "forecast_manifest_sha256": file_hash(MANIFEST_PATH),
+        "views": views,
+    }
+    tmp_path = os.path.join(out_dir, "manifest.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(out_dir, "manifest.json"))
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Pre-render Dashboard and Evaluations views to static JSON/HTML")
+    parser.add_argument("--out-dir", default=EXPORT_DIR)
+    parser.add_argument("--pages", nargs="+", choices=["Dashboard", "Evaluations"], default=["Dashboard", "Evaluations"])
+    parser.add_argument("--themes", nargs="+", choices=list(THEMES), default=["light"])
+    parser.add_argument("--locations", nargs="+", help="location codes to export (default: all)")
+    parser.add_argument("--formats", nargs="+", choices=["json", "html"], default=["json", "html"])
+    parser.add_argument("--latest-only", action="store_true",
+                        help="only the latest reference date of each Dashboard view")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--models", nargs="+", choices=list(load_model_registry()),
+                        help="models to export (default: the app's default selection)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = export_static(args.out_dir, args.pages, args.themes, args.locations, args.formats,
+                             args.latest_only, args.workers, args.models)
+    views = manifest["views"]
+    size_mb = sum(view["bytes"] for view in views) / 1e6
+    print(f"Exported {len(views):,} views ({size_mb:,.1f} MB) to {args.out_dir} "
+          f"in {time.perf_counter() - start:.1f} s")
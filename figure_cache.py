@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+from timing import span
+
+
+# Default byte budget for cached figures; override with FIGURE_CACHE_MB
+DEFAULT_MAX_BYTES = int(float(os.environ.get("FIGURE_CACHE_MB", 64)) * 1024 * 1024)
+
+
+def load_figures(payloads):
+    """Figures from payloads written by Figure.to_json(), skipping validation"""
+    with span("figure_load"):
+        return tuple(go.Figure(json.loads(p), _validate=False) for p in payloads)
+
+
+class FigureCache:
+    """Bounded LRU cache of serialized Plotly figures.
+
+    Entries are stored as JSON strings so their size is known exactly and a
+    cached figure can't be mutated by the page that reads it. When the total
+    size goes over max_bytes the least recently used entries are evicted.
+    Figures are rebuilt from the JSON without plotly's validators, which
+    already ran when they were built; a validated rebuild, as st.plotly_chart
+    does for a plain dict, costs more than building most figures.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every invalidation so figures built from older data are not stored
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Cached figures for key, or None"""
+        with self.lock:
+            payloads = self.entries.get(key)
+            if payloads is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return load_figures(payloads)
+
+    def put(self, key, figures, generation=None):
+        """Serialize and store a tuple of figures under key; returns the JSON payloads.
+
+        generation is the cache generation the figures were built in; they
+        are dropped if an invalidation happened since.
+        """
+        with span("figure_serialize"):
+            payloads = tuple(fig.to_json() for fig in figures)
+        size = sum(len(p) for p in payloads)
+        if size > self.max_bytes:
+            return payloads
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return payloads
+            if key in self.entries:
+                self.nbytes -= sum(len(p) for p in self.entries.pop(key))
+            self.entries[key] = payloads
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= sum(len(p) for p in evicted)
+                self.evictions += 1
+        return payloads
+
+    def get_or_build(self, key, build):
+        """Cached figures for key, calling build() to create them on a miss"""
+        generation = self.generation
+        figures = self.get(key)
+        if figures is None:
+            with span("figure_build"):
+                figures = build()
+            # Drawn from the stored JSON like a hit, so a view sends the same spec either way
+            figures = load_figures(self.put(key, figures, generation))
+        return figures
+
+    def clear(self):
+        """Drop every entry, e.g. after the underlying data was reloaded"""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.generation += 1
+
+    def invalidate(self, stale):
+        """Drop the entries whose key satisfies stale(key); returns how many were dropped"""
+        with self.lock:
+            keys = [key for key in self.entries if stale(key)]
+            for key in keys:
+                self.nbytes -= sum(len(p) for p in self.entries.pop(key))
+            self.generation += 1
+            return len(keys)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,524 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from activity import ACTIVITY_LEVELS
+from calibration import COVERAGE_LEVELS
+from funcs import date_buffer, interval_box_traces, lttb_indices
+from model_registry import UNKNOWN_MODEL_COLOR, model_colors, model_label
+
+
+THEMES = {
+    'light': {
+        'primary': '#2563eb',
+        'secondary': '#64748b',
+        'accent': '#0ea5e9',
+        'success': '#10b981',
+        'warning': '#f59e0b',
+        'danger': '#ef4444',
+        'critical': '#991b1b',
+        'background': '#ffffff',
+        'surface': '#f8fafc',
+        'text': '#1e293b',
+        'text_muted': '#64748b',
+        'border': '#e2e8f0',
+        'app_bg': '#fafafa',
+        'sidebar_bg': 'white',
+        'plotly_template': 'plotly_white',
+        'plotly_bg': 'white',
+        'plotly_grid': 'lightgray'
+    },
+    'dark': {
+        'primary': '#3b82f6',
+        'secondary': '#94a3b8',
+        'accent': '#38bdf8',
+        'success': '#34d399',
+        'warning': '#fbbf24',
+        'danger': '#f87171',
+        'critical': '#dc2626',
+        'background': '#1e293b',
+        'surface': '#334155',
+        'text': '#f1f5f9',
+        'text_muted': '#cbd5e1',
+        'border': '#475569',
+        'app_bg': '#0f172a',
+        'sidebar_bg': '#1e293b',
+        'plotly_template': 'plotly_dark',
+        'plotly_bg': '#1e293b',
+        'plotly_grid': '#334155'
+    }
+}
+
+# Observed series longer than this switch to long-history mode: LTTB-downsampled
+# to this many points and drawn as WebGL traces with typed-array data
+LONG_HISTORY_POINTS = int(os.environ.get("LONG_HISTORY_POINTS", 500))
+
+
+def observed_trace(df_state_target, marker, hovertemplate, max_points=LONG_HISTORY_POINTS):
+    """Observed series as markers; long series are downsampled into a Scattergl trace"""
+    if len(df_state_target) <= max_points:
+        return go.Scatter(
+            x=df_state_target['date'],
+            y=df_state_target['value'],
+            mode='markers',
+            name='Observed',
+            marker=marker,
+            hovertemplate=hovertemplate
+        )
+    df_sorted = df_state_target[df_state_target['value'].notna()].sort_values('date')
+    x = date_buffer(df_sorted['date'])
+    y = df_sorted['value'].to_numpy(dtype=np.float64)
+    keep = lttb_indices(x, y, max_points)
+    return go.Scattergl(
+        x=x[keep],
+        y=y[keep],
+        mode='markers',
+        name='Observed',
+        marker=marker,
+        hovertemplate=hovertemplate
+    )
+
+
+def forecast_traces(cube, model, reference_date, location_id, color, name, long_history=False,
+                    fill_opacity=0.1, line_width=2, dash=None):
+    """95% band and median line of one forecast in the cube, or [] if it has none"""
+    q_lower, q_median, q_upper = cube.quantile_index([0.025, 0.5, 0.975])
+    forecast = cube.forecast(model, reference_date, location_id)
+    if forecast is None:
+        return []
+    # Keep horizons this model actually forecast
+    valid = ~np.isnan(forecast).all(axis=1)
+    if not valid.any():
+        return []
+    forecast = forecast[valid]
+    x_dates = cube.target_end_dates(reference_date, cube.horizons[valid])
+    if long_history:
+        # Typed arrays rather than lists of dates and floats
+        x_dates = date_buffer(x_dates)
+        lower, median, upper = (forecast[:, q].astype(np.float64) for q in (q_lower, q_median, q_upper))
+        band_x, band_y = np.concatenate([x_dates, x_dates[::-1]]), np.concatenate([upper, lower[::-1]])
+    else:
+        x_dates = x_dates.tolist()
+        median = forecast[:, q_median].tolist()
+        band_x = x_dates + x_dates[::-1]
+        band_y = forecast[:, q_upper].tolist() + forecast[:, q_lower].tolist()[::-1]
+
+    traces = []
+    # Add confidence intervals
+    if not np.isnan(forecast[:, q_lower]).all() and not np.isnan(forecast[:, q_upper]).all():
+        traces.append(go.Scatter(
+            x=band_x,
+            y=band_y,
+            fill='toself',
+            fillcolor=f'rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, {fill_opacity})',
+            line=dict(color='rgba(255,255,255,0)'),
+            name=f'{name} 95% CI',
+            legendgroup=model,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+    
+    # Median line
+    if not np.isnan(forecast[:, q_median]).all():
+        line = dict(color=color, width=line_width)
+        if dash is not None:
+            line['dash'] = dash
+        traces.append(go.Scatter(
+            x=x_dates,
+            y=median,
+            mode='lines+markers',
+            name=name,
+            legendgroup=model,
+            line=line,
+            marker=dict(size=5, color=color),
+            hovertemplate=f'<b>{name}</b><br>Date: %{{x|%Y-%m-%d}}<br>Median: %{{y:,.0f}}<extra></extra>'
+        ))
+    return traces
+
+
+def build_dashboard_figure(cube, location_id, selected_models, selected_ref_date, df_state_target, colors,
+                           max_points=LONG_HISTORY_POINTS, ensemble=None):
+    """Forecast bands, medians and observations for the Dashboard chart.
+
+    ensemble is an optional single-model cube from ensemble.build_ensembles,
+    drawn as its own band on top of the individual models.
+    """
+    long_history = len(df_state_target) > max_points
+    
+    fig = go.Figure()
+    
+    # Plot each selected model
+    if selected_ref_date is not None:
+        for model in selected_models:
+            fig.add_traces(forecast_traces(
+                cube, model, selected_ref_date, location_id,
+                model_colors().get(model, UNKNOWN_MODEL_COLOR), model_label(model), long_history
+            ))
+        if ensemble is not None:
+            fig.add_traces(forecast_traces(
+                ensemble, ensemble.models[0], selected_ref_date, location_id,
+                colors['text'], ensemble.models[0], long_history,
+                fill_opacity=0.15, line_width=3, dash='dash'
+            ))
+    
+    # Add observed data
+    fig.add_trace(observed_trace(
+        df_state_target,
+        marker=dict(
+            color=colors['danger'],
+            size=8,
+            symbol='circle',
+            line=dict(color=colors['danger'], width=1)
+        ),
+        hovertemplate='<b>Observed</b><br>Date: %{x|%Y-%m-%d}<br>Value: %{y:,.0f}<extra></extra>',
+        max_points=max_points
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title=None,
+        xaxis_title="Date",
+        yaxis_title="Weekly Hospitalizations",
+        hovermode='x unified',
+        template=colors['plotly_template'],
+        height=500,
+        margin=dict(t=40, b=60, l=60, r=20),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5,
+            bgcolor=colors['background'],
+            bordercolor=colors['border'],
+            borderwidth=1,
+            font=dict(size=11)
+        ),
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg']
+    )
+    
+    fig.update_xaxes(
+        tickformat="%b %d",
+        tickangle=-45,
+        showgrid=True,
+        gridwidth=1,
+        gridcolor=colors['plotly_grid']
+    )
+    if long_history:
+        # Epoch-millisecond buffers only read as dates on an explicit date axis
+        fig.update_xaxes(type='date')
+    
+    fig.update_yaxes(
+        rangemode='tozero',
+        tickformat=',',
+        showgrid=True,
+        gridwidth=1,
+        gridcolor=colors['plotly_grid']
+    )
+    
+    return fig
+
+
+def build_evaluation_figures(cube, df_scores, df_target_data, location_id, selected_model, selected_horizon, selected_score, colors,
+                             max_points=LONG_HISTORY_POINTS):
+    """Interval-box chart and score chart for the Evaluations page"""
+    df_scores_all = df_scores[(df_scores.location == location_id) & 
+                                (df_scores.Model == selected_model)]
+    
+    # reference_date x quantile forecasts for the selected horizon
+    horizon_forecasts = cube.horizon_series(selected_model, location_id, selected_horizon)
+    has_forecast = ~np.isnan(horizon_forecasts).all(axis=1)
+    reference_dates = cube.reference_dates[has_forecast]
+    horizon_forecasts = horizon_forecasts[has_forecast]
+    target_dates = reference_dates + timedelta(weeks=selected_horizon)
+    q_lower, q_median, q_upper = cube.quantile_index([0.025, 0.5, 0.975])
+    df_horizon_score = df_scores_all[df_scores_all['horizon'] == selected_horizon].copy()
+    df_horizon_score['target_end_date'] = pd.to_datetime(df_horizon_score['target_end_date'])
+    df_horizon_score = df_horizon_score[df_horizon_score.score==selected_score]
+    # Get observed data
+    df_state_target = df_target_data[df_target_data.location == location_id]
+    df_horizon_score.sort_values(by = "target_end_date", inplace = True)
+    
+    # Create the visualization
+    fig = go.Figure()
+    
+    # Get model color
+    model_color = model_colors().get(selected_model, UNKNOWN_MODEL_COLOR)
+    
+    if len(reference_dates) > 0:
+        # Convert hex to RGB for transparency
+        r = int(model_color[1:3], 16)
+        g = int(model_color[3:5], 16)
+        b = int(model_color[5:7], 16)
+        
+        # 95% CI boxes and median ticks for every reference date, batched into two traces
+        opacity = 0.4
+        box_color = f'rgba({r}, {g}, {b}, {opacity * 0.4})'
+        line_color = f'rgba({r}, {g}, {b}, {opacity + 0.2})'
+        fig.add_traces(interval_box_traces(
+            target_dates,
+            horizon_forecasts[:, q_lower],
+            horizon_forecasts[:, q_upper],
+            horizon_forecasts[:, q_median],
+            box_color,
+            line_color
+        ))
+    
+    # Add observed data as dots
+    fig.add_trace(observed_trace(
+        df_state_target,
+        marker=dict(
+            color='white',
+            size=8,
+            symbol='circle',
+            line=dict(color='black', width=2)
+        ),
+        hovertemplate='<b>Observed</b><br>Date: %{x|%b %d}<br>Value: %{y:,.0f}<extra></extra>',
+        max_points=max_points
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title=f"95% Confidence Intervals - Horizon {selected_horizon}",
+        xaxis_title="Target Date",
+        yaxis_title="Weekly Hospitalizations",
+        template=colors['plotly_template'],
+        height=500,
+        showlegend=True,
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg'],
+        hovermode='x unified'
+    )
+    
+    # Format axes
+    fig.update_xaxes(
+        tickformat="%b %d",
+        showgrid=True,
+        gridwidth=0.5,
+        gridcolor=colors['plotly_grid']
+    )
+    if len(df_state_target) > max_points:
+        fig.update_xaxes(type='date')
+    
+    fig.update_yaxes(
+        tickformat=',',
+        showgrid=True,
+        gridwidth=0.5,
+        gridcolor=colors['plotly_grid'],
+        rangemode='tozero'
+    )
+    
+    # Create the visualization
+    fig_score = go.Figure()
+
+    # Add observed data as dots
+    fig_score.add_trace(go.Scatter(
+        x=df_horizon_score['target_end_date'],
+        y=df_horizon_score['value'],
+        name='Score',
+        line=dict(color=model_color, width=3),  # controls the line
+        marker=dict(
+            color=model_color,
+            size=8,
+            symbol='circle',
+            line=dict(color=model_color, width=7)
+        ),
+        hovertemplate='skip'
+    ))
+
+
+    # Update layout
+    fig_score.update_layout(
+        title=f"{selected_score} by horizon",
+        xaxis_title="Target Date",
+        yaxis_title=f"{selected_score}",
+        template=colors['plotly_template'],
+        height=500,
+        showlegend=True,
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg'],
+        hovermode='x unified'
+    )
+    
+    # Format axes
+    fig_score.update_xaxes(
+        tickformat="%b %d",
+        showgrid=True,
+        gridwidth=0.5,
+        gridcolor=colors['plotly_grid'],
+        range = [df_target_data.date.min(),target_dates.max()]
+    )
+    
+    fig_score.update_yaxes(
+        tickformat=',',
+        showgrid=True,
+        gridwidth=0.5,
+        gridcolor=colors['plotly_grid'],
+        rangemode='tozero'
+    )
+    
+    return fig, fig_score
+
+
+
+def build_calibration_figures(calibration, location_id, selected_model, selected_horizon, level, colors,
+                              location_names=None):
+    """Coverage curves, PIT histogram and coverage heatmap for the Evaluations page.
+
+    Everything is read from a CalibrationCube, so redrawing for another
+    selection only reduces a few small arrays.
+    """
+    cube = calibration.cube
+    nominal = [int(round(l * 100)) for l in COVERAGE_LEVELS]
+    
+    # Empirical vs nominal coverage of every model at the selected location and horizon
+    fig_curve = go.Figure()
+    fig_curve.add_trace(go.Scatter(
+        x=[0, 100],
+        y=[0, 100],
+        mode='lines',
+        name='Ideal',
+        line=dict(color=colors['text_muted'], width=1, dash='dash'),
+        hoverinfo='skip'
+    ))
+    coverage, counts = calibration.coverage_curve(location_id, selected_horizon)
+    for model, row, n in zip(cube.models, coverage, counts):
+        if n == 0:
+            continue
+        model_color = model_colors().get(model, UNKNOWN_MODEL_COLOR)
+        width = 3 if model == selected_model else 1.5
+        fig_curve.add_trace(go.Scatter(
+            x=nominal,
+            y=row * 100,
+            mode='lines+markers',
+            name=model_label(model),
+            line=dict(color=model_color, width=width),
+            marker=dict(size=2 * width + 2, color=model_color),
+            hovertemplate=f'<b>{model_label(model)}</b><br>%{{x}}% interval: %{{y:.0f}}% covered ({n} forecasts)<extra></extra>'
+        ))
+    fig_curve.update_layout(
+        title=f"Interval Coverage - Horizon {selected_horizon}",
+        xaxis_title="Nominal Coverage (%)",
+        yaxis_title="Empirical Coverage (%)",
+        template=colors['plotly_template'],
+        height=400,
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg'],
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5, font=dict(size=11))
+    )
+    fig_curve.update_xaxes(range=[0, 100], showgrid=True, gridcolor=colors['plotly_grid'])
+    fig_curve.update_yaxes(range=[0, 100], showgrid=True, gridcolor=colors['plotly_grid'])
+    
+    # PIT histogram of the selected model; a calibrated model is flat at 1 / bins
+    shares = calibration.pit_histogram(selected_model, location_id, selected_horizon)
+    bins = len(shares)
+    model_color = model_colors().get(selected_model, UNKNOWN_MODEL_COLOR)
+    fig_pit = go.Figure(go.Bar(
+        x=(np.arange(bins) + 0.5) / bins,
+        y=shares,
+        width=1 / bins,
+        marker=dict(color=model_color, line=dict(color=colors['plotly_bg'], width=1)),
+        name='PIT',
+        hovertemplate='PIT %{x:.2f}: %{y:.1%} of forecasts<extra></extra>'
+    ))
+    fig_pit.add_hline(y=1 / bins, line=dict(color=colors['text_muted'], width=1, dash='dash'))
+    fig_pit.update_layout(
+        title=f"PIT Histogram - {model_label(selected_model)}",
+        xaxis_title="PIT",
+        yaxis_title="Share of Forecasts",
+        template=colors['plotly_template'],
+        height=400,
+        showlegend=False,
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg']
+    )
+    fig_pit.update_xaxes(range=[0, 1])
+    fig_pit.update_yaxes(tickformat='.0%', rangemode='tozero', showgrid=True, gridcolor=colors['plotly_grid'])
+    
+    # Coverage of the selected interval for every location and horizon
+    by_location = calibration.coverage_by_location(selected_model, level) * 100
+    names = [(location_names or {}).get(loc, loc) for loc in cube.locations]
+    fig_heatmap = go.Figure(go.Heatmap(
+        z=by_location,
+        x=[str(int(h)) for h in cube.horizons],
+        y=names,
+        zmin=0,
+        zmax=100,
+        # White at the nominal level: red under-covers, blue over-covers
+        colorscale=[[0, '#b2182b'], [level, '#f7f7f7'], [1, '#2166ac']],
+        colorbar=dict(title="Covered (%)"),
+        hovertemplate='<b>%{y}</b><br>Horizon %{x}: %{z:.0f}% covered<extra></extra>'
+    ))
+    fig_heatmap.update_layout(
+        title=f"{int(round(level * 100))}% Interval Coverage by Location - {model_label(selected_model)}",
+        xaxis_title="Horizon",
+        template=colors['plotly_template'],
+        height=max(400, 14 * len(names)),
+        paper_bgcolor=colors['plotly_bg'],
+        plot_bgcolor=colors['plotly_bg']
+    )
+    fig_heatmap.update_yaxes(autorange='reversed', dtick=1, tickfont=dict(size=9))
+    
+    return fig_curve, fig_pit, fig_heatmap
+
+# Metrics the Overview map can color by: (column, colorbar title)
+OVERVIEW_METRICS = {
+    'Activity level': ('level', 'Activity'),
+    'Rate per 100k': ('rate_per_100k', 'Per 100k'),
+    'Next-week median': ('next_week', 'Admissions'),
+}
+
+
+def activity_colors(colors):
+    return [colors['success'], colors['warning'], colors['danger'], colors['critical']]
+
+
+def build_overview_figure(df_activity, layer, metric, colors, selected_state=None):
+    """National choropleth of location_activity() rows over one GeoJSON layer.
+
+    Locations without a feature in the layer (US, Puerto Rico) are left to
+    the table beside the map. The selected state gets a heavier outline.
+    """
+    names = {feature['id'] for feature in layer['features']}
+    df = df_activity[df_activity.location_name.isin(names) & (df_activity.level >= 0)]
+    column, title = OVERVIEW_METRICS[metric]
+
+    if column == 'level':
+        # One flat color band per level
+        n = len(ACTIVITY_LEVELS)
+        colorscale = [[edge / n, color] for i, color in enumerate(activity_colors(colors)) for edge in (i, i + 1)]
+        scale = dict(colorscale=colorscale, zmin=-0.5, zmax=n - 0.5,
+                     colorbar=dict(title=title, tickvals=list(range(n)), ticktext=ACTIVITY_LEVELS))
+    else:
+        scale = dict(colorscale='YlOrRd', colorbar=dict(title=title, tickformat=','))
+
+    fig = go.Figure(go.Choropleth(
+        geojson=layer,
+        locations=df.location_name,
+        z=df[column],
+        customdata=np.column_stack([df.next_week, df.rate_per_100k, df.activity, df.probability]),
+        marker_line_color=colors['border'],
+        marker_line_width=np.where(df.location_name == selected_state, 2.5, 0.5),
+        hovertemplate=('<b>%{location}</b><br>Next week: %{customdata[0]:,.0f}'
+                       '<br>Rate: %{customdata[1]:.2f} per 100k<br>Activity: %{customdata[2]} (%{customdata[3]:.0%})<extra></extra>'),
+        **scale
+    ))
+    fig.update_layout(
+        geo=dict(
+            scope='usa',
+            projection_type='albers usa',
+            bgcolor='rgba(0,0,0,0)',
+            showlakes=False,
+        ),
+        height=500,
+        margin=dict(l=0, r=0, t=20, b=0),
+        dragmode=False,
+        template=colors['plotly_template'],
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+
+AXES = ["model", "reference_date", "location", "horizon", "quantile"]
+
+# Per-forecast dashboard metrics, in the order of ForecastCube.summary's last axis
+SUMMARY_FIELDS = ["next_week", "four_week_avg", "peak", "ci_lower", "ci_upper"]
+
+
+class ForecastCube:
+    """Dense quantile forecasts indexed by model x reference_date x location x horizon x quantile.
+
+    Missing tasks are NaN. Each axis has a lookup map from label to position
+    so a page can pull the slice it needs without scanning the long table.
+    """
+
+    def __init__(self, values, models, reference_dates, locations, horizons, quantiles):
+        self.values = values
+        self.models = list(models)
+        self.reference_dates = pd.DatetimeIndex(reference_dates)
+        self.locations = list(locations)
+        self.horizons = np.asarray(horizons)
+        self.quantiles = np.asarray(quantiles, dtype=float)
+        self.index = {
+            "model": {m: i for i, m in enumerate(self.models)},
+            "reference_date": {d: i for i, d in enumerate(self.reference_dates)},
+            "location": {loc: i for i, loc in enumerate(self.locations)},
+            "horizon": {int(h): i for i, h in enumerate(self.horizons)},
+            "quantile": {float(q): i for i, q in enumerate(self.quantiles)},
+        }
+        # model x reference_date x location x SUMMARY_FIELDS, filled by build_cube
+        self.summary = None
+        # model x reference_date x location x horizon x activity level probabilities, see activity.activity_index
+        self.activity = None
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def position(self, axis, label):
+        """Position of a label on an axis, or None if it is not in the cube"""
+        if axis == "reference_date":
+            label = pd.Timestamp(label)
+        return self.index[axis].get(label)
+
+    def quantile_index(self, levels):
+        return [self.index["quantile"][float(q)] for q in levels]
+
+    def target_end_dates(self, reference_date, horizons=None):
+        """Target end dates for a reference date (hub horizons are in weeks)"""
+        horizons = self.horizons if horizons is None else np.asarray(horizons)
+        return pd.Timestamp(reference_date) + pd.to_timedelta(7 * horizons.astype(int), unit="D")
+
+    def forecast(self, model, reference_date, location):
+        """horizon x quantile array for one forecast, or None if absent"""
+        m = self.position("model", model)
+        r = self.position("reference_date", reference_date)
+        loc = self.position("location", location)
+        if m is None or r is None or loc is None:
+            return None
+        return self.values[m, r, loc]
+
+    def horizon_series(self, model, location, horizon):
+        """reference_date x quantile array of one model's forecasts at one horizon"""
+        m = self.position("model", model)
+        loc = self.position("location", location)
+        h = self.position("horizon", horizon)
+        if m is None or loc is None or h is None:
+            return np.full((len(self.reference_dates), len(self.quantiles)), np.nan, dtype=self.values.dtype)
+        return self.values[m, :, loc, h]
+
+    def subset(self, reference_dates=None, locations=None):
+        """Sub-cube over positional (or boolean) reference_date and location selections"""
+        r = slice(None) if reference_dates is None else reference_dates
+        loc = slice(None) if locations is None else locations
+        return ForecastCube(
+            self.values[:, r][:, :, loc],
+            models=self.models,
+            reference_dates=self.reference_dates[r],
+            locations=np.asarray(self.locations, dtype=object)[loc],
+            horizons=self.horizons,
+            quantiles=self.quantiles,
+        )
+
+    def summarize(self):
+        """Dashboard metrics for every (model, reference_date, location) in one pass.
+
+        next_week and the 95% bounds come from the first horizon with a
+        median; four_week_avg and peak reduce over all horizons. Forecasts
+        without a median are NaN; missing bounds are 0.
+        """
+        q_lower, q_median, q_upper = self.quantile_index([0.025, 0.5, 0.975])
+        medians = self.values[..., q_median]
+        valid = ~np.isnan(medians)
+        has_median = valid.any(axis=-1)
+        first = np.argmax(valid, axis=-1)[..., None]
+
+        def at_first(q):
+            return np.take_along_axis(self.values[..., q], first, axis=-1)[..., 0]
+
+        summary = np.full(medians.shape[:3] + (len(SUMMARY_FIELDS),), np.nan, dtype=np.float32)
+        with np.errstate(invalid="ignore"):
+            summary[..., 0] = at_first(q_median)
+            summary[has_median, 1] = np.nanmean(medians[has_median], axis=-1)
+            summary[has_median, 2] = np.nanmax(medians[has_median], axis=-1)
+        summary[..., 3] = np.nan_to_num(at_first(q_lower), nan=0)
+        summary[..., 4] = np.nan_to_num(at_first(q_upper), nan=0)
+        summary[~has_median] = np.nan
+        return summary
+
+    def summary_rows(self, models, reference_date, location):
+        """Summary rows (len(models) x SUMMARY_FIELDS) for the models that have a forecast"""
+        r = self.position("reference_date", reference_date)
+        loc = self.position("location", location)
+        m = [self.index["model"][model] for model in models if model in self.index["model"]]
+        if r is None or loc is None or len(m) == 0:
+            return np.empty((0, len(SUMMARY_FIELDS)), dtype=np.float32)
+        rows = self.summary[m, r, loc]
+        return rows[~np.isnan(rows[:, 0])]
+
+    def available_dates(self, location, models):
+        """Reference dates with at least one forecast for the location from any of the models"""
+        loc = self.position("location", location)
+        m = [self.index["model"][model] for model in models if model in self.index["model"]]
+        if loc is None or len(m) == 0:
+            return self.reference_dates[:0]
+        has_data = ~np.isnan(self.values[m, :, loc]).all(axis=(0, 2, 3))
+        return self.reference_dates[has_data]
+
+
+def build_cube(df_forecasts):
+    """Scatter the long quantile table into a ForecastCube in one vectorized pass"""
+    axes = {}
+    codes = []
+    for axis, column in zip(AXES, ["model", "reference_date", "location", "horizon", "output_type_id"]):
+        axis_codes, labels = pd.factorize(df_forecasts[column], sort=True)
+        axes[axis] = np.asarray(labels)
+        codes.append(axis_codes)
+
+    shape = tuple(len(axes[axis]) for axis in AXES)
+    values = np.full(shape, np.nan, dtype=np.float32)
+    values[tuple(codes)] = df_forecasts['value'].to_numpy(dtype=np.float32)
+
+    cube = ForecastCube(
+        values,
+        models=axes["model"],
+        reference_dates=axes["reference_date"],
+        locations=axes["location"],
+        horizons=axes["horizon"],
+        quantiles=axes["quantile"],
+    )
+    cube.summary = cube.summarize()
+    return cube
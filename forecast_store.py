@@ -0,0 +1,677 @@
+import fcntl
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, partial
+from glob import glob as lsfiles
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from timing import span
+
+
+FORECASTS_DIR = "forecasts"
+STORE_DIR = "store/forecasts"
+MANIFEST_PATH = "store/manifest.json"
+QUARANTINE_PATH = "store/quarantine.json"
+TARGET_PATH = "target_surveillance/target-hospital-admissions.csv"
+LOCATIONS_PATH = "locations.csv"
+
+# Earliest forecasts and observations shown by the dashboard
+FORECAST_START_DATE = "2024-09-30"
+TARGET_START_DATE = "2024-10-30"
+
+# Worker processes used to parse CSVs; override with FORECAST_WORKERS
+DEFAULT_WORKERS = int(os.environ.get("FORECAST_WORKERS", os.cpu_count() or 1))
+
+# Hub file names look like 2024-11-30-MOBS-GLEAM_FLUH.csv
+FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})-(.+)\.csv$")
+
+# Partition keys are kept as strings so ISO dates compare correctly
+PARTITIONING = ds.partitioning(
+    pa.schema([
+        ("model", pa.string()),
+        ("season", pa.string()),
+        ("reference_date", pa.string()),
+    ]),
+    flavor="hive",
+)
+
+CSV_DTYPES = {
+    "reference_date": str,
+    "target": str,
+    "horizon": "int64",
+    "target_end_date": str,
+    "location": str,
+    "output_type": str,
+    "output_type_id": str,
+    "value": "float64",
+}
+
+# Columns that repeat a handful of values on every row
+CATEGORY_COLUMNS = ["location", "model", "output_type_id"]
+# Columns dropped from the loaded table when they hold a single value
+CONSTANT_COLUMNS = ["target", "output_type"]
+
+# Quantile levels and horizons a hub file may contain
+QUANTILE_LEVELS = [0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5,
+                   0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.975, 0.99]
+HORIZONS = [-1, 0, 1, 2, 3]
+
+# Columns identifying one forecast task within a file
+TASK_COLUMNS = ["target", "horizon", "location", "output_type"]
+
+TARGET_DTYPES = {
+    "date": str,
+    "location": str,
+    "location_name": str,
+    "value": "float64",
+    "weekly_rate": "float64",
+}
+
+
+def season_of(date):
+    """Return the flu season label (e.g. '2024-2025') a date falls in"""
+    date = pd.Timestamp(date)
+    start = date.year if date.month >= 8 else date.year - 1
+    return f"{start}-{start + 1}"
+
+
+def parse_forecast_path(path):
+    """Split a hub file path into (reference_date, model)"""
+    match = FILE_PATTERN.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Not a hub forecast file: {path}")
+    return match.group(1), match.group(2)
+
+
+def partition_dir(model, reference_date, store_dir=STORE_DIR):
+    """Directory holding the partition for one model and reference date"""
+    return os.path.join(
+        store_dir,
+        f"model={model}",
+        f"season={season_of(reference_date)}",
+        f"reference_date={reference_date}",
+    )
+
+
+def stored_partition(path, store_dir=STORE_DIR):
+    """Partition directory of a hub file, or None for a file name that isn't hub format"""
+    try:
+        reference_date, model = parse_forecast_path(path)
+    except ValueError:
+        return None
+    return partition_dir(model, reference_date, store_dir)
+
+
+def read_hub_csv(path):
+    """Read a hub CSV with its ingest dtypes, or as strings when a column won't convert.
+
+    The string fallback only happens for malformed files, and lets
+    validation point at the offending rows instead of failing the read.
+    """
+    try:
+        return pd.read_csv(path, dtype=CSV_DTYPES)
+    except ValueError:
+        return pd.read_csv(path, dtype=str)
+
+
+def ingest_file(path, store_dir=STORE_DIR, locations_path=LOCATIONS_PATH):
+    """Validate one hub-format CSV and convert it into its parquet partition.
+
+    Returns (partition directory, problems). A file with problems is not
+    written, so the store keeps its last valid version, if any.
+    """
+    try:
+        reference_date, model = parse_forecast_path(path)
+        with span("read", file=path):
+            df = read_hub_csv(path)
+    except (ValueError, pd.errors.ParserError) as e:
+        return None, {"parse": str(e)}
+    with span("validate", file=path):
+        problems = validate_forecasts(df, path, known_locations(locations_path))
+    if problems:
+        return None, problems
+    df = df.astype(CSV_DTYPES)[list(CSV_DTYPES)]
+    # Partition columns live in the directory names, not in the file
+    df = df.drop(columns=["reference_date"])
+    # Sorting keeps row-group statistics useful for location filters
+    df = df.sort_values(["location", "horizon", "output_type"], kind="stable")
+
+    out_dir = partition_dir(model, reference_date, store_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    # Written under a hidden per-process name (dataset scans skip dot files) and
+    # swapped in, so a reader never sees a half-written partition
+    tmp_path = os.path.join(out_dir, f".part-0.parquet.{os.getpid()}")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, os.path.join(out_dir, "part-0.parquet"))
+    return out_dir, {}
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def known_locations(locations_path=LOCATIONS_PATH):
+    """Location codes in locations.csv, re-read whenever the file changes"""
+    return _read_locations(locations_path, file_stamp(locations_path))
+
+
+@lru_cache(maxsize=8)
+def _read_locations(locations_path, stamp):
+    return frozenset(pd.read_csv(locations_path, dtype={"location": str}).location)
+
+
+def validate_forecasts(df, path, locations):
+    """Hub-format problems in one file, as read by read_hub_csv.
+
+    Each rule is checked for all rows at once. String columns are factorized
+    once and the rules work on the integer codes: a task code built from
+    them drives the duplicate check, and quantile tasks are laid out as a
+    task x level matrix so completeness and monotonicity need no sort.
+    Returns {check: message} naming up to five offending CSV lines, or {}
+    for a valid file.
+    """
+    missing = [c for c in CSV_DTYPES if c not in df.columns]
+    if missing:
+        return {"columns": f"missing required columns: {', '.join(missing)}"}
+
+    problems = {}
+
+    def flag(check, bad, what):
+        bad = np.asarray(bad, dtype=bool)
+        n = int(bad.sum())
+        if n:
+            lines = ", ".join(str(i + 2) for i in np.flatnonzero(bad)[:5])
+            problems[check] = f"{n} rows {what} (lines {lines}{', ...' if n > 5 else ''})"
+
+    reference_date, model = parse_forecast_path(path)
+    folder = os.path.basename(os.path.dirname(path))
+    if folder != model:
+        problems["model"] = f"file for {model} is in the {folder} folder"
+
+    # Integer codes per row and the few distinct values they index; missing values get a code of their own
+    codes = {}
+    for column in ("target", "horizon", "target_end_date", "location", "output_type", "output_type_id"):
+        values = df[column]
+        if column == "horizon":
+            # No-op on a typed read; coerces to NaN on the string fallback
+            values = pd.to_numeric(values, errors="coerce")
+        codes[column] = pd.factorize(values, use_na_sentinel=False)
+    value = pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype=np.float64)
+
+    horizon_code, horizons = codes["horizon"]
+    end_date_code, end_dates = codes["target_end_date"]
+    location_code, location_values = codes["location"]
+    valid_horizon = np.isin(horizons, HORIZONS)
+    expected_end_dates = [
+        (pd.Timestamp(reference_date) + pd.Timedelta(weeks=h)).strftime("%Y-%m-%d") if ok else None
+        for h, ok in zip(horizons, valid_horizon)
+    ]
+    wrong_end_date = np.array([[ok and d != expected for d in end_dates]
+                               for ok, expected in zip(valid_horizon, expected_end_dates)],
+                              dtype=bool).reshape(len(horizons), len(end_dates))
+
+    flag("reference_date", df["reference_date"] != reference_date, f"with a reference_date other than {reference_date}")
+    flag("horizon", ~valid_horizon[horizon_code], f"with a horizon outside {HORIZONS}")
+    flag("target_end_date", wrong_end_date[horizon_code, end_date_code],
+         "with a target_end_date other than reference_date + horizon weeks")
+    flag("location", ~np.isin(location_values, list(locations))[location_code],
+         "with a location code not in locations.csv")
+    flag("value", np.isnan(value) | (value < 0), "with a missing, non-numeric or negative value")
+
+    # One integer per (target, horizon, location, output_type), then per output_type_id within it
+    task = np.zeros(len(df), dtype=np.int64)
+    for column in TASK_COLUMNS:
+        column_code, uniques = codes[column]
+        task = task * len(uniques) + column_code
+    id_code, ids = codes["output_type_id"]
+    entry = task * len(ids) + id_code
+    first = np.unique(entry, return_index=True)[1]
+    repeated = np.ones(len(df), dtype=bool)
+    repeated[first] = False
+    flag("duplicate", repeated, "repeating an earlier task and output_type_id")
+
+    # Level positions by exact string, parsing only ids written another way (e.g. "0.50")
+    output_type_code, output_types = codes["output_type"]
+    rows = np.flatnonzero(np.asarray(output_types == "quantile", dtype=bool)[output_type_code])
+    positions = {str(level): i for i, level in enumerate(QUANTILE_LEVELS)}
+    levels = np.array([positions.get(i, np.nan) for i in ids], dtype=np.float64)
+    other = np.isnan(levels)
+    if other.any():
+        level = pd.to_numeric(pd.Series(ids[other], dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+        position = np.minimum(np.searchsorted(QUANTILE_LEVELS, level), len(QUANTILE_LEVELS) - 1)
+        levels[other] = np.where(np.asarray(QUANTILE_LEVELS)[position] == level, position, np.nan)
+    k = levels[id_code[rows]]
+    known = ~np.isnan(k)
+    bad_level = np.zeros(len(df), dtype=bool)
+    bad_level[rows[~known]] = True
+    flag("quantile_level", bad_level, "with a quantile level outside the hub set")
+
+    # Each quantile task needs every level once, with values non-decreasing in the level
+    _, task = np.unique(task[rows], return_inverse=True)
+    rows, task, k = rows[known], task[known], k[known].astype(int)
+    counts = np.zeros((task.max() + 1 if len(task) else 0, len(QUANTILE_LEVELS)), dtype=int)
+    np.add.at(counts, (task, k), 1)
+    incomplete = np.zeros(len(df), dtype=bool)
+    incomplete[rows[(counts != 1).any(axis=1)[task]]] = True
+    flag("quantile_set", incomplete, f"in a task without exactly one value per each of the {len(QUANTILE_LEVELS)} quantile levels")
+
+    matrix = np.full(counts.shape, np.nan)
+    matrix[task, k] = value[rows]
+    drops = np.diff(matrix, axis=1) < 0
+    decreasing = np.zeros(len(df), dtype=bool)
+    decreasing[rows[(k > 0) & drops[task, np.maximum(k - 1, 0)]]] = True
+    flag("monotone", decreasing, "with a value below the previous quantile level of its task")
+    return problems
+
+
+def quarantine_beside(manifest_path):
+    """Quarantine report kept next to a store's manifest"""
+    return os.path.join(os.path.dirname(manifest_path), os.path.basename(QUARANTINE_PATH))
+
+
+def read_quarantine(quarantine_path=QUARANTINE_PATH):
+    if not os.path.exists(quarantine_path):
+        return {}
+    with open(quarantine_path) as f:
+        return json.load(f)
+
+
+def update_quarantine(manifest, checked, stored, quarantine_path=QUARANTINE_PATH):
+    """Record this sync's failing files and drop entries for files that passed or are gone.
+
+    checked maps every file validated in this sync to its problems ({} if
+    valid); stored holds the paths whose earlier valid version is still in
+    the store, so removing them later also removes their partition.
+    """
+    old = read_quarantine(quarantine_path)
+    report = {path: entry for path, entry in old.items() if path in manifest and path not in checked}
+    now = datetime.now().isoformat(timespec="seconds")
+    for path, problems in checked.items():
+        if problems:
+            report[path] = {"sha256": manifest[path]["sha256"], "checked": now, "stored": path in stored,
+                            "problems": problems}
+    if report != old:
+        os.makedirs(os.path.dirname(quarantine_path), exist_ok=True)
+        tmp_path = f"{quarantine_path}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, quarantine_path)
+    return report
+
+
+def compact_forecasts(df):
+    """Shrink a loaded forecast table to its compact in-memory schema.
+
+    Location, model and quantile level become categoricals (the quantile
+    levels stay float64 categories so comparisons like == 0.025 still hold),
+    horizon becomes int8, value float32, and constant target / output_type
+    columns are dropped.
+    """
+    constant = [c for c in CONSTANT_COLUMNS if c in df.columns and df[c].nunique() <= 1]
+    df = df.drop(columns=constant)
+    dtypes = {c: "category" for c in CATEGORY_COLUMNS + CONSTANT_COLUMNS if c in df.columns}
+    dtypes["horizon"] = "int8"
+    dtypes["value"] = "float32"
+    return df.astype(dtypes)
+
+
+def memory_report(tables):
+    """Rows, columns and deep memory use (MB) for a dict of named DataFrames"""
+    rows = []
+    for name, df in tables.items():
+        usage = df.memory_usage(deep=True)
+        rows.append({
+            "table": name,
+            "rows": len(df),
+            "columns": df.shape[1],
+            "memory_mb": usage.sum() / 1e6,
+            "bytes_per_row": usage.sum() / max(len(df), 1),
+        })
+    return pd.DataFrame(rows).set_index("table")
+
+
+def map_files(func, paths, workers=DEFAULT_WORKERS):
+    """Apply func to every path, spreading the files over a process pool.
+
+    Workers come from a forkserver rather than fork(): this also runs inside
+    the Streamlit server, from the script and the watcher threads, where
+    forking a multi-threaded process can deadlock the child.
+    """
+    paths = list(paths)
+    if workers <= 1 or len(paths) <= 1:
+        return [func(path) for path in paths]
+    workers = min(workers, len(paths))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        return list(pool.map(func, paths, chunksize=max(1, len(paths) // (4 * workers))))
+
+
+def ingest_forecasts(forecasts_dir=FORECASTS_DIR, store_dir=STORE_DIR, workers=DEFAULT_WORKERS):
+    """Convert every valid hub-format CSV under forecasts_dir into the parquet store"""
+    paths = sorted(lsfiles(os.path.join(forecasts_dir, "*", "*.csv")))
+    results = map_files(partial(ingest_file, store_dir=store_dir), paths, workers)
+    return [path for path, (out_dir, _) in zip(paths, results) if out_dir is not None]
+
+
+def read_forecast_file(path, output_type="quantile", start_date=None):
+    """Parse one hub CSV into the loaded-table layout.
+
+    Filtering, date conversion and the output_type_id cast all happen here so
+    they run inside the worker that parsed the file.
+    """
+    reference_date, model = parse_forecast_path(path)
+    with span("read", file=path):
+        df = pd.read_csv(path, dtype=CSV_DTYPES)
+    with span("filter", file=path):
+        if output_type is not None:
+            df = df[df['output_type'] == output_type]
+    with span("convert", file=path):
+        df['reference_date'] = pd.to_datetime(df['reference_date'])
+        df['target_end_date'] = pd.to_datetime(df['target_end_date'])
+        if start_date is not None:
+            df = df[df['reference_date'] >= pd.Timestamp(start_date)]
+        if output_type == "quantile":
+            df['output_type_id'] = df['output_type_id'].astype(float)
+        df['model'] = model
+    return df
+
+
+def read_forecast_files(paths, workers=DEFAULT_WORKERS, output_type="quantile", start_date=None):
+    """Parse many hub CSVs in parallel and concatenate them once at the end"""
+    read = partial(read_forecast_file, output_type=output_type, start_date=start_date)
+    frames = map_files(read, paths, workers)
+    with span("concat", files=len(frames)):
+        df = pd.concat(frames, ignore_index=True)
+    with span("compact"):
+        return compact_forecasts(df)
+
+
+def read_target_data(path=TARGET_PATH):
+    """Read the surveillance file with pyarrow's multithreaded CSV parser"""
+    with span("read", file=path):
+        df = pd.read_csv(path, dtype=TARGET_DTYPES, engine="pyarrow")
+    with span("convert", file=path):
+        df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def load_forecasts(models=None, locations=None, start_date=None, end_date=None,
+                   reference_dates=None, output_type="quantile", store_dir=STORE_DIR):
+    """Read forecasts from the store, pushing every filter down to the scan.
+
+    Model, season and reference date filters prune whole partitions; location
+    and output_type filters are applied while reading the parquet row groups.
+    """
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING)
+
+    filters = []
+    if models is not None:
+        filters.append(ds.field("model").isin(list(models)))
+    if start_date is not None:
+        start_date = pd.Timestamp(start_date)
+        filters.append(ds.field("season") >= season_of(start_date))
+        filters.append(ds.field("reference_date") >= start_date.strftime("%Y-%m-%d"))
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date)
+        filters.append(ds.field("season") <= season_of(end_date))
+        filters.append(ds.field("reference_date") <= end_date.strftime("%Y-%m-%d"))
+    if reference_dates is not None:
+        reference_dates = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in reference_dates]
+        filters.append(ds.field("reference_date").isin(reference_dates))
+    if locations is not None:
+        filters.append(ds.field("location").isin(list(locations)))
+    if output_type is not None:
+        filters.append(ds.field("output_type") == output_type)
+
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    with span("scan", store=store_dir):
+        table = dataset.to_table(filter=expression)
+    with span("convert", rows=table.num_rows):
+        df = table.to_pandas()
+        df = df.drop(columns=["season"])
+        df['reference_date'] = pd.to_datetime(df['reference_date'])
+        df['target_end_date'] = pd.to_datetime(df['target_end_date'])
+        if output_type == "quantile":
+            df['output_type_id'] = df['output_type_id'].astype(float)
+    with span("compact"):
+        return compact_forecasts(df)
+
+
+# ============================================================================
+# MANIFEST / INCREMENTAL INGESTION
+# ============================================================================
+
+def file_hash(path, chunk_size=1 << 20):
+    """sha256 of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_stamp(path):
+    """(size, mtime) of a file, a cheap check for whether it changed"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, manifest_path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f"{manifest_path}.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+# Lock state per lock file: (thread lock, open lock file, nesting depth)
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+
+
+@contextmanager
+def store_lock(manifest_path=MANIFEST_PATH):
+    """Exclusive lock on the store next to manifest_path, across processes.
+
+    Every Streamlit process runs its own watcher against the same store, so
+    syncing, scoring and publishing hold this flock on the store's .lock
+    file. It is re-entrant within a thread: sync_store and update_scores
+    take it themselves and also run inside a refresh that holds it.
+    """
+    lock_path = os.path.join(os.path.dirname(manifest_path), ".lock")
+    with _store_locks_guard:
+        state = _store_locks.setdefault(lock_path, [threading.RLock(), None, 0])
+    with state[0]:
+        if state[2] == 0:
+            os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+            state[1] = open(lock_path, "a")
+            fcntl.flock(state[1], fcntl.LOCK_EX)
+        state[2] += 1
+        try:
+            yield
+        finally:
+            state[2] -= 1
+            if state[2] == 0:
+                fcntl.flock(state[1], fcntl.LOCK_UN)
+                state[1].close()
+                state[1] = None
+
+
+def scan_forecasts(forecasts_dir=FORECASTS_DIR, previous=None):
+    """Build a manifest {path: {size, mtime, sha256}} for every hub CSV.
+
+    Files whose size and mtime match the previous manifest reuse its hash,
+    so only new or touched files are read.
+    """
+    previous = previous or {}
+    manifest = {}
+    for path in sorted(lsfiles(os.path.join(forecasts_dir, "*", "*.csv"))):
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+        old = previous.get(path)
+        if old is not None and old["size"] == entry["size"] and old["mtime"] == entry["mtime"]:
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = file_hash(path)
+        manifest[path] = entry
+    return manifest
+
+
+def diff_manifests(old, new):
+    """Compare two manifests and list added, replaced and removed files"""
+    return {
+        "added": sorted(p for p in new if p not in old),
+        "replaced": sorted(p for p in new if p in old and new[p]["sha256"] != old[p]["sha256"]),
+        "removed": sorted(p for p in old if p not in new),
+    }
+
+
+def sync_store(forecasts_dir=FORECASTS_DIR, store_dir=STORE_DIR, manifest_path=MANIFEST_PATH,
+               workers=DEFAULT_WORKERS, quarantine_path=None):
+    """Bring the store in line with forecasts_dir, parsing only changed files.
+
+    Changed files are validated first. Files that fail are quarantined: the
+    store is left as it was for them, and the problems go into the
+    quarantine report (quarantine.json next to the manifest) until a fixed
+    file replaces them.
+
+    Runs under store_lock, so processes sharing the store sync one at a time.
+
+    Returns the added / replaced / removed file lists that reached the
+    store, plus the files quarantined in this sync.
+    """
+    if quarantine_path is None:
+        quarantine_path = quarantine_beside(manifest_path)
+    with store_lock(manifest_path):
+        old = read_manifest(manifest_path)
+        with span("scan_manifest", files=len(old)):
+            new = scan_forecasts(forecasts_dir, old)
+        changes = diff_manifests(old, new)
+
+        # Paths with a valid version in the store: a quarantined file only has one if an
+        # earlier version passed, and a misplaced copy must not touch the partition it names
+        previously_quarantined = read_quarantine(quarantine_path)
+        stored = {path for path in old if previously_quarantined.get(path, {}).get("stored", True)
+                  and stored_partition(path, store_dir) is not None}
+        changes["removed"] = [path for path in changes["removed"] if path in stored]
+
+        # Drop removed partitions first, in case an added file maps onto the same one
+        for path in changes["removed"]:
+            shutil.rmtree(stored_partition(path, store_dir), ignore_errors=True)
+        paths = changes["added"] + changes["replaced"]
+        with span("ingest", files=len(paths)):
+            results = map_files(partial(ingest_file, store_dir=store_dir), paths, workers)
+
+        checked = {path: problems for path, (_, problems) in zip(paths, results)}
+        changes["quarantined"] = sorted(path for path, problems in checked.items() if problems)
+        changes["added"] = [path for path in changes["added"] if not checked[path]]
+        changes["replaced"] = [path for path in changes["replaced"] if not checked[path]]
+        if checked or previously_quarantined:
+            update_quarantine(new, checked, stored, quarantine_path)
+
+        if old != new:
+            write_manifest(new, manifest_path)
+        return changes
+
+
+def has_changes(changes):
+    """Whether a sync_store report changed what the store holds"""
+    return any(len(changes[kind]) > 0 for kind in ("added", "replaced", "removed"))
+
+
+def merge_forecasts(df, changes, models=None, start_date=None, store_dir=STORE_DIR):
+    """Apply a sync_store change report to an already-loaded forecast table.
+
+    Rows for replaced or removed (model, reference_date) partitions are
+    dropped, and only the added or replaced partitions are read back in.
+    """
+    touched = {}
+    for path in changes["added"] + changes["replaced"] + changes["removed"]:
+        reference_date, model = parse_forecast_path(path)
+        touched.setdefault(model, set()).add(pd.Timestamp(reference_date))
+
+    keep = pd.Series(True, index=df.index)
+    for model, dates in touched.items():
+        keep &= ~((df['model'] == model) & df['reference_date'].isin(list(dates)))
+    parts = [df[keep]]
+
+    for path in changes["added"] + changes["replaced"]:
+        reference_date, model = parse_forecast_path(path)
+        if models is not None and model not in models:
+            continue
+        if start_date is not None and pd.Timestamp(reference_date) < pd.Timestamp(start_date):
+            continue
+        parts.append(load_forecasts(models=[model], reference_dates=[reference_date],
+                                    store_dir=store_dir))
+
+    # Categories differ between parts, so re-compact after the concat
+    return compact_forecasts(pd.concat(parts, ignore_index=True))
+
+
+def format_changes(changes):
+    """One-line summary of a sync_store change report"""
+    return ", ".join(f"{len(paths)} {kind}" for kind, paths in changes.items())
+
+
+def format_quarantine(report):
+    """One block per quarantined file listing its failed checks"""
+    lines = []
+    for path, entry in sorted(report.items()):
+        lines.append(f"  {path}")
+        lines.extend(f"    {check}: {message}" for check, message in entry["problems"].items())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or update the partitioned forecast store")
+    parser.add_argument("--forecasts-dir", default=FORECASTS_DIR)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--memory-report", action="store_true",
+                        help="print the in-memory size of the loaded tables after syncing")
+    args = parser.parse_args()
+
+    changes = sync_store(args.forecasts_dir, args.store_dir, args.manifest, args.workers)
+    print(f"Synced {args.store_dir}: {format_changes(changes)}")
+    for kind, paths in changes.items():
+        for path in paths:
+            print(f"  {kind}: {path}")
+    quarantine = read_quarantine(quarantine_beside(args.manifest))
+    if quarantine:
+        print(f"Quarantined ({len(quarantine)} files, not in the store until fixed):")
+        print(format_quarantine(quarantine))
+
+    if args.memory_report:
+        df_forecasts = load_forecasts(start_date=FORECAST_START_DATE, store_dir=args.store_dir)
+        print(memory_report({
+            "forecasts": df_forecasts,
+            "forecasts (uncompacted)": df_forecasts.astype({
+                "location": str, "model": str, "output_type_id": "float64",
+                "horizon": "int64", "value": "float64"}),
+            "target_data": read_target_data(),
+        }).round(2).to_string())
@@ -1,27 +1,70 @@
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
-import geopandas as gpd
 
 
-def create_simple_state_map(selected_state, usa_gpd, fill_color='#3498db'):
+STATES_SHAPEFILE = "states_21basic/states.shp"
+
+# Simplification tolerances in degrees for each map detail level
+GEOMETRY_TOLERANCES = {'high': 0.005, 'medium': 0.02, 'low': 0.05}
+
+
+def build_state_geometry(usa_gpd, tolerances=GEOMETRY_TOLERANCES, grid_size=1e-3):
+    """Per-state simplified GeoJSON features at each detail level plus a bounds index"""
+    geometry = {'bounds': {}, 'features': {}}
+    for name, bounds in zip(usa_gpd['STATE_NAME'], usa_gpd.geometry.bounds.itertuples(index=False)):
+        geometry['bounds'][name] = tuple(bounds)
+
+    for level, tolerance in tolerances.items():
+        simplified = usa_gpd.geometry.simplify(tolerance, preserve_topology=True).set_precision(grid_size)
+        geometry['features'][level] = {
+            name: {
+                'type': 'Feature',
+                'id': name,
+                'properties': {'STATE_NAME': name},
+                'geometry': geom.__geo_interface__,
+            }
+            for name, geom in zip(usa_gpd['STATE_NAME'], simplified)
+        }
+    return geometry
+
+
+@st.cache_resource
+def load_state_geometry(shapefile=STATES_SHAPEFILE):
+    """Read the state shapefile once and keep its simplified geometry cache.
+
+    geopandas is imported here rather than at module level so pages that
+    never draw a map don't pay for the geospatial stack.
+    """
+    import geopandas as gpd
+
+    return build_state_geometry(gpd.read_file(shapefile))
+
+
+@st.cache_resource
+def load_national_layer(detail='low'):
+    """Every state as one GeoJSON FeatureCollection (feature ids are state names)"""
+    features = load_state_geometry()['features'][detail]
+    return {'type': 'FeatureCollection', 'features': list(features.values())}
+
+
+def create_simple_state_map(selected_state, fill_color='#3498db', detail='medium', geometry=None):
     """Create a simple map showing the selected state using Plotly's built-in choropleth"""
-    
-    df_state = usa_gpd[usa_gpd.STATE_NAME==selected_state]
-    df_state['value'] = fill_color
-    state_row = df_state[df_state["STATE_NAME"] == selected_state].iloc[0]
-    minx, miny, maxx, maxy = state_row.geometry.bounds
+    geometry = load_state_geometry() if geometry is None else geometry
+    feature = geometry['features'][detail][selected_state]
+    minx, miny, maxx, maxy = geometry['bounds'][selected_state]
 
     # Create choropleth map
-    fig = px.choropleth(
-        df_state,
-        geojson=df_state.geometry,
-        locations=df_state.index,
-        color='value',
-        hover_name='STATE_NAME'
-    )
+    fig = go.Figure(go.Choropleth(
+        geojson={'type': 'FeatureCollection', 'features': [feature]},
+        locations=[selected_state],
+        z=[1],
+        colorscale=[[0, fill_color], [1, fill_color]],
+        showscale=False,
+        hovertext=[selected_state],
+        marker_line_width=0.5
+    ))
     fig.update_geos(fitbounds="locations", visible=False)
     
     fig.update_layout(
@@ -51,4 +94,78 @@ def create_simple_state_map(selected_state, usa_gpd, fill_color='#3498db'):
         hovertemplate='<b>%{hovertext}</b><extra></extra>' # put information here
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+def interval_box_traces(target_dates, lower, upper, median, fill_color, line_color, half_width_days=2):
+    """Draw one interval box and median tick per target date as two traces.
+
+    Every box is a closed polygon in a single filled scatter trace and every
+    median tick a segment in a single line trace, with None separating the
+    pieces, instead of one layout shape plus one trace per box.
+    """
+    dates = pd.DatetimeIndex(target_dates)
+    keep = ~(np.isnan(lower) | np.isnan(upper) | np.isnan(median))
+    dates, lower, upper, median = dates[keep], np.asarray(lower)[keep], np.asarray(upper)[keep], np.asarray(median)[keep]
+    n = len(dates)
+
+    x0 = (dates - pd.Timedelta(days=half_width_days)).to_pydatetime()
+    x1 = (dates + pd.Timedelta(days=half_width_days)).to_pydatetime()
+    gap = np.full(n, None, dtype=object)
+
+    box_x = np.column_stack([x0, x1, x1, x0, x0, gap]).ravel()
+    box_y = np.column_stack([lower, lower, upper, upper, lower, gap]).ravel()
+    tick_x = np.column_stack([x0, x1, gap]).ravel()
+    tick_y = np.column_stack([median, median, gap]).ravel()
+
+    boxes = go.Scatter(
+        x=box_x,
+        y=box_y,
+        mode='lines',
+        fill='toself',
+        fillcolor=fill_color,
+        line=dict(color=line_color, width=1),
+        showlegend=False,
+        hoverinfo='skip'
+    )
+    ticks = go.Scatter(
+        x=tick_x,
+        y=tick_y,
+        mode='lines',
+        line=dict(color='black', width=1),
+        showlegend=False,
+        hoverinfo='skip'
+    )
+    return [boxes, ticks]
+
+
+def lttb_indices(x, y, n_out):
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling.
+
+    x must be increasing. The first and last points are always kept, and
+    from each of the n_out - 2 buckets between them the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    mean, which preserves peaks and the overall shape of the series.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def date_buffer(dates):
+    """Dates as float64 epoch milliseconds, which plotly sends as a typed array on a date axis"""
+    return pd.DatetimeIndex(dates).values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
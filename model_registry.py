@@ -0,0 +1,132 @@
+import json
+import os
+import zlib
+from functools import lru_cache
+
+from plotly.colors import qualitative
+
+from forecast_store import FILE_PATTERN, FORECASTS_DIR
+
+
+# Optional per-model metadata, one <model>.json or <model>.yml per model as in hub repositories
+MODEL_METADATA_DIR = "model-metadata"
+
+# The hub's long-standing models keep the colors they have always been drawn in
+PINNED_MODEL_COLORS = {
+    'MOBS-GLEAM_FLUH': '#2563eb',
+    'NEU_ISI-AdaptiveEnsemble': '#dc2626',
+    'NEU_ISI-FluBcast': '#16a34a',
+}
+# Other models get a palette color hashed from their name, so a new folder never
+# recolors existing models; a "color" metadata field overrides either
+MODEL_PALETTE = qualitative.Dark24
+UNKNOWN_MODEL_COLOR = '#808080'
+
+# Models selected on first visit when no metadata marks any as designated_model
+DEFAULT_MODELS = list(PINNED_MODEL_COLORS)
+# ... or, in a hub without any of them, this many models in discovery order
+DEFAULT_MODEL_COUNT = 3
+
+
+def discover_models(forecasts_dir=FORECASTS_DIR):
+    """Model folders under forecasts_dir holding at least one hub-format file, sorted"""
+    if not os.path.isdir(forecasts_dir):
+        return []
+    return sorted(
+        entry.name for entry in os.scandir(forecasts_dir)
+        if entry.is_dir() and any(FILE_PATTERN.match(name) for name in os.listdir(entry.path))
+    )
+
+
+def palette_color(model):
+    """Default color of a model, the same in every process and whatever else is discovered"""
+    if model in PINNED_MODEL_COLORS:
+        return PINNED_MODEL_COLORS[model]
+    return MODEL_PALETTE[zlib.crc32(model.encode()) % len(MODEL_PALETTE)]
+
+
+def read_model_metadata(model, metadata_dir=MODEL_METADATA_DIR):
+    """One model's metadata file as a dict, or {} when it has none.
+
+    YAML files need PyYAML, which is imported only when one is found; without
+    it they are skipped and the model keeps its defaults.
+    """
+    for ext in (".json", ".yml", ".yaml"):
+        path = os.path.join(metadata_dir, model + ext)
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            if ext == ".json":
+                return json.load(f)
+            try:
+                import yaml
+            except ImportError:
+                return {}
+            return yaml.safe_load(f) or {}
+    return {}
+
+
+def listing_stamp(forecasts_dir=FORECASTS_DIR, metadata_dir=MODEL_METADATA_DIR):
+    """Modification times of forecasts_dir, its model folders and the metadata files.
+
+    A new model folder, a first file in an empty one, or an edited metadata
+    file each change the stamp, without reading any forecasts.
+    """
+    stamp = []
+    for path in (forecasts_dir, metadata_dir):
+        if not os.path.isdir(path):
+            continue
+        stamp.append((path, os.stat(path).st_mtime_ns))
+        stamp.extend((entry.path, entry.stat().st_mtime_ns) for entry in os.scandir(path)
+                     if entry.is_dir() or path == metadata_dir)
+    return tuple(sorted(stamp))
+
+
+def load_model_registry(forecasts_dir=FORECASTS_DIR, metadata_dir=MODEL_METADATA_DIR):
+    """{model: entry} for every discovered model, in discovery order.
+
+    Only the directory listing and the small metadata files are read, again
+    whenever listing_stamp changes, so a new forecasts/<model>/ folder shows
+    up without a restart; a model's forecasts are loaded when it is first
+    selected. Each entry holds the label and color the pages draw it with,
+    whether it is selected by default, a description for tooltips and the
+    raw metadata.
+    """
+    return _build_registry(forecasts_dir, metadata_dir, listing_stamp(forecasts_dir, metadata_dir))
+
+
+@lru_cache(maxsize=8)
+def _build_registry(forecasts_dir, metadata_dir, stamp):
+    registry = {}
+    for model in discover_models(forecasts_dir):
+        metadata = read_model_metadata(model, metadata_dir)
+        names = [metadata.get(key) for key in ("team_name", "model_name") if metadata.get(key)]
+        registry[model] = {
+            "label": metadata.get("label", model.replace('_', ' ')),
+            "color": metadata.get("color", palette_color(model)),
+            "designated": bool(metadata.get("designated_model", False)),
+            "description": " · ".join(names + ([metadata["methods"]] if metadata.get("methods") else [])),
+            "metadata": metadata,
+        }
+    return registry
+
+
+def default_models(registry):
+    """Models selected on first visit: the designated ones, else DEFAULT_MODELS.
+
+    Only a hub holding none of either falls back to the first
+    DEFAULT_MODEL_COUNT discovered, so a new folder doesn't change the
+    selection of an existing deployment.
+    """
+    designated = [model for model, entry in registry.items() if entry["designated"]]
+    pinned = [model for model in DEFAULT_MODELS if model in registry]
+    return designated or pinned or list(registry)[:DEFAULT_MODEL_COUNT]
+
+
+def model_colors():
+    """{model: hex color} for every discovered model"""
+    return {model: entry["color"] for model, entry in load_model_registry().items()}
+
+
+def model_label(model):
+    return load_model_registry().get(model, {}).get("label", model.replace('_', ' '))
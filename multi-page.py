@@ -1,8 +1,18 @@
 from funcs import *
-from datetime import datetime, timedelta
+from activity import ACTIVITY_LEVELS, location_activity, location_thresholds, most_likely_level, next_week_probabilities
+from datetime import datetime
 import pandas as pd
-import plotly.graph_objects as go
-from glob import glob as lsfiles
+import os
+from forecast_store import FORECAST_START_DATE, LOCATIONS_PATH
+from figure_cache import FigureCache
+from calibration import COVERAGE_LEVELS
+from figures import OVERVIEW_METRICS, THEMES, activity_colors, build_calibration_figures, build_dashboard_figure, build_evaluation_figures, build_overview_figure
+from ensemble import ENSEMBLE_METHODS, build_ensembles, skill_weights
+from model_registry import default_models, load_model_registry, model_colors, model_label
+from shared_store import SharedStore, SnapshotWatcher
+from scoring import SCORES
+from timing import append_jsonl, process_rss, span, start_recording, stop_recording
+import time
 import numpy as np
 
 # ============================================================================
@@ -33,51 +43,7 @@ elif st.session_state.selected_horizon > 3:
 # THEME CONFIGURATION
 # ============================================================================
 
-THEMES = {
-    'light': {
-        'primary': '#2563eb',
-        'secondary': '#64748b',
-        'accent': '#0ea5e9',
-        'success': '#10b981',
-        'warning': '#f59e0b',
-        'danger': '#ef4444',
-        'background': '#ffffff',
-        'surface': '#f8fafc',
-        'text': '#1e293b',
-        'text_muted': '#64748b',
-        'border': '#e2e8f0',
-        'app_bg': '#fafafa',
-        'sidebar_bg': 'white',
-        'plotly_template': 'plotly_white',
-        'plotly_bg': 'white',
-        'plotly_grid': 'lightgray'
-    },
-    'dark': {
-        'primary': '#3b82f6',
-        'secondary': '#94a3b8',
-        'accent': '#38bdf8',
-        'success': '#34d399',
-        'warning': '#fbbf24',
-        'danger': '#f87171',
-        'background': '#1e293b',
-        'surface': '#334155',
-        'text': '#f1f5f9',
-        'text_muted': '#cbd5e1',
-        'border': '#475569',
-        'app_bg': '#0f172a',
-        'sidebar_bg': '#1e293b',
-        'plotly_template': 'plotly_dark',
-        'plotly_bg': '#1e293b',
-        'plotly_grid': '#334155'
-    }
-}
-
-# Model color palette
-MODEL_COLORS = {
-    'MOBS-GLEAM_FLUH': '#2563eb',
-    'NEU_ISI-AdaptiveEnsemble': '#dc2626',
-    'NEU_ISI-FluBcast': '#16a34a'
-}
+# THEMES live in figures.py and model colors in model_registry.py, shared with the static export
 
 # Get current theme colors
 COLORS = THEMES[st.session_state.theme]
@@ -261,65 +227,82 @@ states = [
 # DATA LOADING
 # ============================================================================
 
-@st.cache_data
+@st.cache_resource
 def load_data():
-    """Load and cache all data"""
-    usa_gpd = gpd.read_file("states_21basic/states.shp")
-    locations = pd.read_csv("locations.csv")
-    
-    models = ["MOBS-GLEAM_FLUH","NEU_ISI-AdaptiveEnsemble","NEU_ISI-FluBcast"]
-    df_all_forecasts = []
-    
-    for model in models: 
-        forecasts = sorted(lsfiles(f"forecasts/{model}/*"))
-        
-        df_forecasts = pd.concat([pd.read_csv(f) for f in forecasts])
-        df_forecasts = df_forecasts[df_forecasts.output_type == "quantile"]
-        df_forecasts['reference_date'] = pd.to_datetime(df_forecasts['reference_date'])
-        df_forecasts['target_end_date'] = pd.to_datetime(df_forecasts['target_end_date'])
-        df_forecasts['output_type_id'] = df_forecasts['output_type_id'].astype(float)
-        # Remove date filter to get all available data
-        df_forecasts = df_forecasts[df_forecasts.reference_date >= pd.to_datetime("2024-09-30")]
-        df_forecasts['model'] = model
-        
-        # Calculate horizon (weeks ahead)
-        #df_forecasts['horizon'] = ((df_forecasts['target_end_date'] - df_forecasts['reference_date']).dt.days / 7).round().astype(int)
-        
-        df_all_forecasts.append(df_forecasts.copy())
-    
-    df_all_forecasts = pd.concat(df_all_forecasts)
-    
-    df_target_data = pd.read_csv("target_surveillance/target-hospital-admissions.csv")
-    df_target_data['date'] = pd.to_datetime(df_target_data['date'])
-    # Remove date filter to get all available data
-    df_target_data = df_target_data[df_target_data.date >= pd.to_datetime("2024-10-30")]
-
-
-    #load evaluations data
-    scores = ['WIS','WIS_ratio','MAPE']
-    #load evaluations data
-    models = ["MOBS-GLEAM_FLUH","NEU_ISI-AdaptiveEnsemble","NEU_ISI-FluBcast"]
-
-    scores = ['WIS','WIS_ratio','MAPE']
+    """Static lookup data, shared by every session rather than copied per rerun"""
+    locations = pd.read_csv(LOCATIONS_PATH)
+
+    # Scores are computed from the forecasts in load_snapshot().scores()
+    scores = SCORES
+    return locations, scores
+
+
+@st.cache_resource(max_entries=64)
+def load_ensemble(version, method, models, _snapshot, _locations):
+    """Ensemble cube of one model set on one snapshot version, shared by every session.
+
+    Built on first request rather than for every subset, which stops
+    scaling past a handful of models. None when no model in the set has
+    forecasts.
+    """
+    cube = _snapshot.cube
+    members = sorted(model for model in models if model in cube.index["model"])
+    if not members:
+        return None
+    weights = skill_weights(_snapshot.scores(), members) if method == "weighted" else None
+    ensembles = build_ensembles(cube, method, weights, subsets=[frozenset(members)],
+                                thresholds=location_thresholds(_locations, cube.locations))
+    return ensembles[frozenset(members)]
+
+
+@st.cache_resource
+def shared_store():
+    """Current data snapshot, shared by every session in this process"""
+    return SharedStore()
+
+
+def stale_figure(key, touched):
+    """Whether a cached figure depends on forecasts or observations a refresh touched"""
+    page, location, models, reference_date = key[:4]
+    if page == "Calibration":
+        # Coverage curves compare every model over every date
+        return True
+    if len(key) > 7 and key[7] == "weighted" and (touched["forecasts"] or touched["locations"]):
+        # Skill weights come from scores over every location and date, so any change moves them
+        return True
+    if page != "Overview" and location in touched["locations"]:
+        return True
+    return any(model in models and (reference_date is None or reference_date == pd.Timestamp(date))
+               for model, date in touched["forecasts"])
+
+
+def invalidate_figures(touched):
+    """Drop cached figures a new snapshot version made stale"""
+    if touched is None:
+        figure_cache().clear()
+    else:
+        figure_cache().invalidate(lambda key: stale_figure(key, touched))
 
-    df_wis = pd.read_csv("evaluations/%s.csv" % "WIS")
-    df_wis['score'] = "WIS"
-    df_wis = df_wis.rename(columns = {"wis":"value"})
 
-    df_mape = pd.read_csv("evaluations/%s.csv" % "MAPE")
-    df_mape['score'] = "MAPE"
-    df_mape = df_mape.rename(columns = {"MAPE":"value"})
+@st.cache_resource
+def snapshot_watcher(_locations, start_date=FORECAST_START_DATE):
+    """Background thread that publishes new snapshots as hub files change, one per process"""
+    models = default_models(load_model_registry())
+    watcher = SnapshotWatcher(shared_store(), models, _locations, start_date, on_change=invalidate_figures)
+    return watcher.start()
 
 
-    df_wis_ratio = pd.read_csv("evaluations/%s.csv" % "WIS_ratio")
-    df_wis_ratio['score'] = "WIS_ratio"
-    df_wis_ratio = df_wis_ratio.rename(columns = {"wis_ratio":"value"})
+def load_snapshot(models, locations, start_date=FORECAST_START_DATE):
+    """Return the current data snapshot, holding at least the selected models.
 
-    df_scores = pd.concat([df_wis,df_mape,df_wis_ratio])
-    df_scores['reference_date'] = pd.to_datetime(df_scores['reference_date'])
-    df_scores = df_scores[df_scores.Model.isin(models)]
-    df_scores = df_scores[df_scores['reference_date']>'2024-09-01']
-    return usa_gpd, locations, df_all_forecasts, df_target_data, models,df_scores,scores
+    New submissions and surveillance updates are loaded by the watcher
+    thread, so a rerun only reads which version is current. Only the first
+    load, the first selection of a model no session has loaded yet, or a
+    change to the start date or locations.csv builds a snapshot on the
+    request path. Pages read only from the returned snapshot, which never
+    changes after it is published.
+    """
+    return snapshot_watcher(locations, start_date).snapshot_for(models)
 
 # ============================================================================
 # NAVIGATION
@@ -334,7 +317,7 @@ def create_navigation():
     
     with col3:
         # Create button-style navigation
-        nav_col1, nav_col2 = st.columns(2)
+        nav_col1, nav_col2, nav_col3 = st.columns(3)
         
         with nav_col1:
             if st.button("📊 Dashboard", use_container_width=True, 
@@ -347,6 +330,12 @@ def create_navigation():
                         type="primary" if st.session_state.current_page == "Evaluations" else "secondary"):
                 st.session_state.current_page = "Evaluations"
                 st.rerun()
+        
+        with nav_col3:
+            if st.button("🗺️ Overview", use_container_width=True,
+                        type="primary" if st.session_state.current_page == "Overview" else "secondary"):
+                st.session_state.current_page = "Overview"
+                st.rerun()
 
 # ============================================================================
 # SHARED SIDEBAR
@@ -378,15 +367,15 @@ def create_sidebar(models, is_evaluations_page=False):
             selected_model = st.radio(
                 "Select Model",
                 models,
-                format_func=lambda x: x.replace('_', ' '),
+                format_func=model_label,
                 label_visibility="collapsed",
                 key="eval_model_selection"
             )
             selected_models = [selected_model]
             
             # Show color indicator for selected model
-            color = MODEL_COLORS.get(selected_model, '#808080')
-            st.markdown(f'<div style="display: flex; align-items: center;"><div class="model-indicator" style="background-color: {color};"></div><span>{selected_model.replace("_", " ")}</span></div>', 
+            color = model_colors()[selected_model]
+            st.markdown(f'<div style="display: flex; align-items: center;"><div class="model-indicator" style="background-color: {color};"></div><span>{model_label(selected_model)}</span></div>', 
                        unsafe_allow_html=True)
             
             st.divider()
@@ -415,7 +404,8 @@ def create_sidebar(models, is_evaluations_page=False):
             # Multiple model selection for dashboard
             # Initialize model defaults in session state if not present
             if 'model_defaults' not in st.session_state:
-                st.session_state.model_defaults = {model: True for model in models}
+                defaults = default_models(load_model_registry())
+                st.session_state.model_defaults = {model: model in defaults for model in models}
             
             # Quick actions for model selection
             col1, col2 = st.columns(2)
@@ -428,10 +418,11 @@ def create_sidebar(models, is_evaluations_page=False):
                     st.session_state.model_defaults = {model: False for model in models}
                     st.rerun()
             
-            # Create checkboxes for each model
+            # Create checkboxes for each model; a model's data loads when it is first ticked
+            registry = load_model_registry()
             for model in models:
-                model_display = model.replace('_', ' ')
-                color = MODEL_COLORS.get(model, '#808080')
+                model_display = model_label(model)
+                color = registry[model]["color"]
                 
                 # Display model with color indicator
                 col1, col2 = st.columns([1, 10])
@@ -439,12 +430,26 @@ def create_sidebar(models, is_evaluations_page=False):
                     st.markdown(f'<div class="model-indicator" style="background-color: {color};"></div>', 
                                unsafe_allow_html=True)
                 with col2:
-                    default_value = st.session_state.model_defaults.get(model, True)
-                    if st.checkbox(model_display, value=default_value, key=f"model_{model}"):
+                    default_value = st.session_state.model_defaults.get(model, False)
+                    if st.checkbox(model_display, value=default_value, key=f"model_{model}",
+                                   help=registry[model]["description"] or None):
                         selected_models.append(model)
                         st.session_state.model_defaults[model] = True
                     else:
                         st.session_state.model_defaults[model] = False
+            
+            st.divider()
+            
+            # Ensemble of the selected models
+            st.markdown('<div class="section-header">ENSEMBLE</div>', unsafe_allow_html=True)
+            st.selectbox(
+                "Method",
+                options=list(ENSEMBLE_METHODS),
+                format_func=ENSEMBLE_METHODS.get,
+                key="ensemble_method",
+                help="Mean or median of each quantile, or a mean weighted by inverse WIS"
+            )
+            st.checkbox("Show ensemble band", value=True, key="show_ensemble")
         
         st.divider()
         
@@ -493,15 +498,15 @@ def create_sidebar_evals(models, is_evaluations_page=False):
             selected_model = st.radio(
                 "Select Model",
                 models,
-                format_func=lambda x: x.replace('_', ' '),
+                format_func=model_label,
                 label_visibility="collapsed",
                 key="eval_model_selection"
             )
             selected_models = [selected_model]
             
             # Show color indicator for selected model
-            color = MODEL_COLORS.get(selected_model, '#808080')
-            st.markdown(f'<div style="display: flex; align-items: center;"><div class="model-indicator" style="background-color: {color};"></div><span>{selected_model.replace("_", " ")}</span></div>', 
+            color = model_colors()[selected_model]
+            st.markdown(f'<div style="display: flex; align-items: center;"><div class="model-indicator" style="background-color: {color};"></div><span>{model_label(selected_model)}</span></div>', 
                        unsafe_allow_html=True)
             
             st.divider()
@@ -530,7 +535,8 @@ def create_sidebar_evals(models, is_evaluations_page=False):
             # Multiple model selection for dashboard
             # Initialize model defaults in session state if not present
             if 'model_defaults' not in st.session_state:
-                st.session_state.model_defaults = {model: True for model in models}
+                defaults = default_models(load_model_registry())
+                st.session_state.model_defaults = {model: model in defaults for model in models}
             
             # Quick actions for model selection
             col1, col2 = st.columns(2)
@@ -543,10 +549,11 @@ def create_sidebar_evals(models, is_evaluations_page=False):
                     st.session_state.model_defaults = {model: False for model in models}
                     st.rerun()
             
-            # Create checkboxes for each model
+            # Create checkboxes for each model; a model's data loads when it is first ticked
+            registry = load_model_registry()
             for model in models:
-                model_display = model.replace('_', ' ')
-                color = MODEL_COLORS.get(model, '#808080')
+                model_display = model_label(model)
+                color = registry[model]["color"]
                 
                 # Display model with color indicator
                 col1, col2 = st.columns([1, 10])
@@ -554,8 +561,9 @@ def create_sidebar_evals(models, is_evaluations_page=False):
                     st.markdown(f'<div class="model-indicator" style="background-color: {color};"></div>', 
                                unsafe_allow_html=True)
                 with col2:
-                    default_value = st.session_state.model_defaults.get(model, True)
-                    if st.checkbox(model_display, value=default_value, key=f"model_{model}"):
+                    default_value = st.session_state.model_defaults.get(model, False)
+                    if st.checkbox(model_display, value=default_value, key=f"model_{model}",
+                                   help=registry[model]["description"] or None):
                         selected_models.append(model)
                         st.session_state.model_defaults[model] = True
                     else:
@@ -589,11 +597,42 @@ def create_sidebar_evals(models, is_evaluations_page=False):
     
     return selected_state, selected_models,selected_score
 
+# ============================================================================
+# FIGURES
+# ============================================================================
+
+@st.cache_resource
+def figure_cache():
+    """LRU cache of built figures shared by all sessions"""
+    return FigureCache()
+
+
+@st.cache_resource
+def registry_in_use():
+    """The model registry the cached figures were drawn with, shared by all sessions"""
+    return {"registry": None}
+
+
+def load_models():
+    """Models found under forecasts/, re-discovered when the folder or the metadata changes.
+
+    Cached figures bake in each model's color and label, so they are
+    dropped whenever the registry is rebuilt.
+    """
+    registry = load_model_registry()
+    in_use = registry_in_use()
+    if in_use["registry"] is not registry:
+        if in_use["registry"] is not None:
+            figure_cache().clear()
+        in_use["registry"] = registry
+    return list(registry)
+
+
 # ============================================================================
 # DASHBOARD PAGE
 # ============================================================================
 
-def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_target_data, models):
+def dashboard_page(selected_state, selected_models, locations, cube, df_target_data, models, ensemble):
     """Main dashboard page"""
     # Main content header
     st.markdown(f"""
@@ -613,16 +652,15 @@ def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_
     """, unsafe_allow_html=True)
     
     # Get forecast data for selected state and models
-    if selected_state == "United States":
-        location_id = "US"
-    else:
-        location_id = locations[locations.location_name == selected_state].location.unique()[0]
-    df_state_forecast = df_forecasts[(df_forecasts.location == location_id) & 
-                                     (df_forecasts.model.isin(selected_models))]
-    df_state_target = df_target_data[df_target_data.location == location_id]
-    
-    # Get unique reference dates
-    dates = df_state_forecast['reference_date'].sort_values().unique()
+    with span("filter"):
+        if selected_state == "United States":
+            location_id = "US"
+        else:
+            location_id = locations[locations.location_name == selected_state].location.unique()[0]
+        df_state_target = df_target_data[df_target_data.location == location_id]
+        
+        # Get reference dates with forecasts for the selected models
+        dates = cube.available_dates(location_id, selected_models)
     
     # Date selector
     if len(dates) > 1:
@@ -635,6 +673,7 @@ def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_
         )
     else:
         selected_date_idx = 0
+    selected_ref_date = dates[selected_date_idx] if len(selected_models) > 0 and len(dates) > 0 else None
     
     # Main layout
     col1, col2 = st.columns([3, 7])
@@ -642,56 +681,28 @@ def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_
     with col1:
         st.markdown('<div class="section-header">FORECAST METRICS</div>', unsafe_allow_html=True)
         
-        if len(selected_models) > 0 and len(dates) > 0:
-            selected_ref_date = dates[selected_date_idx]
+        if selected_ref_date is not None:
+            # Precomputed metrics of the ensemble forecast on this date
+            ensemble_metrics = ensemble.summary_rows(ensemble.models, selected_ref_date, location_id)
             
-            # Calculate ensemble metrics
-            ensemble_metrics = []
-            
-            for model in selected_models:
-                df_model = df_state_forecast[(df_state_forecast['reference_date'] == selected_ref_date) & 
-                                            (df_state_forecast['model'] == model)]
-                df_median = df_model[df_model['output_type_id'] == 0.5].sort_values('target_end_date')
-                
-                if len(df_median) > 0:
-                    next_week_value = df_median['value'].iloc[0]
-                    four_week_avg = df_median['value'].mean()
-                    peak_value = df_median['value'].max()
-                    
-                    df_next_week = df_model[df_model['target_end_date'] == df_median['target_end_date'].iloc[0]]
-                    ci_95_lower = df_next_week[df_next_week['output_type_id'] == 0.025]['value'].iloc[0] if len(df_next_week[df_next_week['output_type_id'] == 0.025]) > 0 else 0
-                    ci_95_upper = df_next_week[df_next_week['output_type_id'] == 0.975]['value'].iloc[0] if len(df_next_week[df_next_week['output_type_id'] == 0.975]) > 0 else 0
-                    
-                    ensemble_metrics.append({
-                        'model': model,
-                        'next_week': next_week_value,
-                        'four_week_avg': four_week_avg,
-                        'peak': peak_value,
-                        'ci_lower': ci_95_lower,
-                        'ci_upper': ci_95_upper
-                    })
-            
-            if ensemble_metrics:
-                # Calculate ensemble averages
-                avg_next_week = np.mean([m['next_week'] for m in ensemble_metrics])
-                avg_four_week = np.mean([m['four_week_avg'] for m in ensemble_metrics])
-                avg_peak = np.mean([m['peak'] for m in ensemble_metrics])
-                avg_ci_lower = np.mean([m['ci_lower'] for m in ensemble_metrics])
-                avg_ci_upper = np.mean([m['ci_upper'] for m in ensemble_metrics])
+            if len(ensemble_metrics) > 0:
+                avg_next_week, avg_four_week, avg_peak, avg_ci_lower, avg_ci_upper = ensemble_metrics[0]
                 
                 # Get latest observed value
                 latest_observed = df_state_target['value'].iloc[-1] if len(df_state_target) > 0 else 0
                 
-                # Status determination
-                if avg_next_week > 2000:
-                    status = "HIGH"
-                    status_color = COLORS['danger']
-                elif avg_next_week > 1000:
-                    status = "MODERATE"
-                    status_color = COLORS['warning']
+                # Status is the most likely level of the next-week forecast against this location's thresholds
+                probabilities = next_week_probabilities(ensemble, ensemble.position("reference_date", selected_ref_date))
+                probabilities = probabilities[0, ensemble.position("location", location_id)]
+                level = most_likely_level(probabilities)
+                if level >= 0:
+                    status = ACTIVITY_LEVELS[level].upper()
+                    status_color = activity_colors(COLORS)[level]
+                    level_odds = " · ".join(f"{name} {p:.0%}" for name, p in zip(ACTIVITY_LEVELS, probabilities))
                 else:
-                    status = "LOW"
-                    status_color = COLORS['success']
+                    status = "UNKNOWN"
+                    status_color = COLORS['text_muted']
+                    level_odds = "No activity thresholds for this location"
                 
                 # Display ensemble metrics
                 st.markdown(f"""
@@ -699,9 +710,12 @@ def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_
                     <div style="font-size: 0.75rem; color: {COLORS['text_muted']}; text-transform: uppercase; letter-spacing: 0.05em; margin-bottom: 0.5rem;">
                         Ensemble Forecast ({len(selected_models)} models)
                     </div>
-                    <div style="font-size: 1.5rem; font-weight: 600; color: {status_color}; margin-bottom: 1rem;">
+                    <div style="font-size: 1.5rem; font-weight: 600; color: {status_color}; margin-bottom: 0.25rem;">
                         {status} ACTIVITY
                     </div>
+                    <div style="font-size: 0.75rem; color: {COLORS['text_muted']}; margin-bottom: 1rem;">
+                        {level_odds}
+                    </div>
                     <div style="border-top: 1px solid {COLORS['border']}; padding-top: 1rem;">
                         <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
                             <span style="color: {COLORS['text_muted']}; font-size: 0.75rem;">Next Week</span>
@@ -735,122 +749,105 @@ def dashboard_page(selected_state, selected_models, locations, df_forecasts, df_
     with col2:
         st.markdown('<div class="section-header">WEEKLY HOSPITALIZATIONS FORECAST</div>', unsafe_allow_html=True)
         
-        fig = go.Figure()
+        # The band is drawn once at least two models are combined
+        band = ensemble if st.session_state.show_ensemble and len(selected_models) > 1 else None
         
-        # Plot each selected model
-        if len(selected_models) > 0 and len(dates) > 0:
-            selected_ref_date = dates[selected_date_idx]
-            
-            for i, model in enumerate(selected_models):
-                df_model = df_state_forecast[(df_state_forecast['reference_date'] == selected_ref_date) & 
-                                            (df_state_forecast['model'] == model)]
-                
-                if len(df_model) == 0:
-                    continue
-                    
-                pivot_df = df_model.pivot_table(
-                    index='target_end_date',
-                    columns='output_type_id',
-                    values='value',
-                    aggfunc='first'
-                ).reset_index()
-                
-                pivot_df = pivot_df.sort_values('target_end_date')
-                x_dates = pivot_df['target_end_date'].tolist()
-                
-                model_color = MODEL_COLORS.get(model, '#808080')
-                model_name = model.replace('_', ' ')
-                
-                # Add confidence intervals
-                if 0.025 in pivot_df.columns and 0.975 in pivot_df.columns:
-                    fig.add_trace(go.Scatter(
-                        x=x_dates + x_dates[::-1],
-                        y=pivot_df[0.975].tolist() + pivot_df[0.025].tolist()[::-1],
-                        fill='toself',
-                        fillcolor=f'rgba({int(model_color[1:3], 16)}, {int(model_color[3:5], 16)}, {int(model_color[5:7], 16)}, 0.1)',
-                        line=dict(color='rgba(255,255,255,0)'),
-                        name=f'{model_name} 95% CI',
-                        legendgroup=model,
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
-                
-                # Median line
-                if 0.5 in pivot_df.columns:
-                    fig.add_trace(go.Scatter(
-                        x=x_dates,
-                        y=pivot_df[0.5].tolist(),
-                        mode='lines+markers',
-                        name=model_name,
-                        legendgroup=model,
-                        line=dict(color=model_color, width=2),
-                        marker=dict(size=5, color=model_color),
-                        hovertemplate=f'<b>{model_name}</b><br>Date: %{{x|%Y-%m-%d}}<br>Median: %{{y:,.0f}}<extra></extra>'
-                    ))
-        
-        # Add observed data
-        fig.add_trace(go.Scatter(
-            x=df_state_target['date'],
-            y=df_state_target['value'],
-            mode='markers',
-            name='Observed',
-            marker=dict(
-                color=COLORS['danger'],
-                size=8,
-                symbol='circle',
-                line=dict(color=COLORS['danger'], width=1)
-            ),
-            hovertemplate='<b>Observed</b><br>Date: %{x|%Y-%m-%d}<br>Value: %{y:,.0f}<extra></extra>'
-        ))
-        
-        # Update layout
-        fig.update_layout(
-            title=None,
-            xaxis_title="Date",
-            yaxis_title="Weekly Hospitalizations",
-            hovermode='x unified',
-            template=COLORS['plotly_template'],
-            height=500,
-            margin=dict(t=40, b=60, l=60, r=20),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="center",
-                x=0.5,
-                bgcolor=COLORS['background'],
-                bordercolor=COLORS['border'],
-                borderwidth=1,
-                font=dict(size=11)
-            ),
-            paper_bgcolor=COLORS['plotly_bg'],
-            plot_bgcolor=COLORS['plotly_bg']
-        )
+        # Figures are cached on every input that changes the plot
+        figure_key = ("Dashboard", location_id, tuple(selected_models), selected_ref_date, None, None, st.session_state.theme,
+                      st.session_state.ensemble_method if band is not None else None)
+        with span("figure"):
+            fig, = figure_cache().get_or_build(figure_key, lambda: (
+                build_dashboard_figure(cube, location_id, selected_models, selected_ref_date, df_state_target, COLORS,
+                                       ensemble=band),
+            ))
         
-        fig.update_xaxes(
-            tickformat="%b %d",
-            tickangle=-45,
-            showgrid=True,
-            gridwidth=1,
-            gridcolor=COLORS['plotly_grid']
+        config = {'displayModeBar': True, 'displaylogo': False}
+        with span("plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True, config=config)
+
+# ============================================================================
+# OVERVIEW PAGE
+# ============================================================================
+
+def overview_page(selected_state, selected_models, locations, cube, ensemble):
+    """National map of every location's ensemble forecast on one reference date"""
+    st.markdown(f"""
+    <div style="
+        background: {COLORS['background']};
+        padding: 1.5rem 2rem;
+        margin: 1rem -1rem 2rem -1rem;
+        border-bottom: 2px solid {COLORS['border']};
+    ">
+        <h1 style="margin: 0; font-size: 1.875rem; color: {COLORS['text']};">
+            National Influenza Overview
+        </h1>
+        <p style="color: {COLORS['text_muted']}; margin-top: 0.25rem; font-size: 0.875rem;">
+            Next-week ensemble forecast by location · Updated {datetime.now().strftime('%B %d, %Y')} · {len(selected_models)} model(s) selected
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if ensemble is None:
+        st.warning("No models selected or no data available")
+        return
+    
+    # Reference dates with a forecast for any location
+    dates = ensemble.reference_dates[~np.isnan(ensemble.summary[0, :, :, 0]).all(axis=1)]
+    if len(dates) == 0:
+        st.warning("No models selected or no data available")
+        return
+    if len(dates) > 1:
+        selected_date_idx = st.select_slider(
+            "📅 Select Forecast Date",
+            options=range(len(dates)),
+            value=len(dates) - 1,
+            format_func=lambda x: dates[x].strftime('%B %d, %Y'),
+            key="overview_date_slider"
         )
-        
-        fig.update_yaxes(
-            rangemode='tozero',
-            tickformat=',',
-            showgrid=True,
-            gridwidth=1,
-            gridcolor=COLORS['plotly_grid']
+    else:
+        selected_date_idx = 0
+    selected_ref_date = dates[selected_date_idx]
+    
+    metric = st.radio("Color by", list(OVERVIEW_METRICS), horizontal=True, key="overview_metric")
+    
+    # Every location in one pass over the ensemble summary
+    with span("filter"):
+        df_activity = location_activity(ensemble, selected_ref_date, locations)
+    
+    col1, col2 = st.columns([7, 3])
+    
+    with col1:
+        st.markdown('<div class="section-header">NEXT-WEEK FORECAST BY STATE</div>', unsafe_allow_html=True)
+        figure_key = ("Overview", None, tuple(selected_models), selected_ref_date, metric, selected_state,
+                      st.session_state.theme, st.session_state.ensemble_method)
+        with span("figure"):
+            fig, = figure_cache().get_or_build(figure_key, lambda: (
+                build_overview_figure(df_activity, load_national_layer(), metric, COLORS, selected_state),
+            ))
+        with span("plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+    
+    with col2:
+        st.markdown('<div class="section-header">ALL LOCATIONS</div>', unsafe_allow_html=True)
+        table = df_activity[df_activity.level >= 0].sort_values("rate_per_100k", ascending=False)
+        st.dataframe(
+            table[["location_name", "next_week", "rate_per_100k", "activity", "probability"]],
+            column_config={
+                "location_name": "Location",
+                "next_week": st.column_config.NumberColumn("Next Week", format="%.0f"),
+                "rate_per_100k": st.column_config.NumberColumn("Per 100k", format="%.2f"),
+                "activity": "Activity",
+                "probability": st.column_config.NumberColumn("Chance", format="percent"),
+            },
+            hide_index=True,
+            height=500,
         )
-        
-        config = {'displayModeBar': True, 'displaylogo': False}
-        st.plotly_chart(fig, use_container_width=True, config=config)
 
 # ============================================================================
 # EVALUATIONS PAGE
 # ============================================================================
 
-def evaluations_page(selected_state, selected_models,selected_score, locations, df_forecasts, df_target_data,df_scores):
+def evaluations_page(selected_state, selected_models,selected_score, locations, cube, df_target_data,df_scores, calibration):
     """Evaluations page showing forecast performance across horizons"""
     
     selected_horizon = st.session_state.selected_horizon
@@ -867,220 +864,152 @@ def evaluations_page(selected_state, selected_models,selected_score, locations,
             Forecast Evaluations - {selected_state}
         </h1>
         <p style="color: {COLORS['text_muted']}; margin-top: 0.25rem; font-size: 0.875rem;">
-            Model: {selected_models[0].replace('_', ' ')} · Horizon {selected_horizon} · Updated {datetime.now().strftime('%B %d, %Y')}
+            Model: {model_label(selected_models[0])} · Horizon {selected_horizon} · Updated {datetime.now().strftime('%B %d, %Y')}
         </p>
     </div>
     """, unsafe_allow_html=True)
     
     # Get data for selected state and model
-    if selected_state=="United States":
-        location_id = "US"
-    else:
-        location_id = locations[locations.location_name == selected_state].location.unique()[0]
+    with span("filter"):
+        if selected_state=="United States":
+            location_id = "US"
+        else:
+            location_id = locations[locations.location_name == selected_state].location.unique()[0]
 
     selected_model = selected_models[0]
     
-    # Get all forecasts for the model and location
-    df_model_all = df_forecasts[(df_forecasts.location == location_id) & 
-                                (df_forecasts.model == selected_model)]
-    df_scores_all = df_scores[(df_scores.location == location_id) & 
-                                (df_scores.Model == selected_model)]
+    # Figures are cached on every input that changes the plot
+    figure_key = ("Evaluations", location_id, (selected_model,), None, selected_horizon, selected_score, st.session_state.theme)
+    with span("figure"):
+        fig, fig_score = figure_cache().get_or_build(figure_key, lambda: build_evaluation_figures(
+            cube, df_scores, df_target_data, location_id, selected_model, selected_horizon, selected_score, COLORS
+        ))
     
-    # Filter for selected horizon
-    df_horizon = df_model_all[df_model_all['horizon'] == selected_horizon].copy()
-    df_horizon_score = df_scores_all[df_scores_all['horizon'] == selected_horizon].copy()
-    df_horizon_score['target_end_date'] = pd.to_datetime(df_horizon_score['target_end_date'])
-    df_horizon_score = df_horizon_score[df_horizon_score.score==selected_score]
-    # Get observed data
-    df_state_target = df_target_data[df_target_data.location == location_id]
-    df_horizon_score.sort_values(by = "target_end_date", inplace = True)
     # Main visualization - Simple 95% CI Boxes (COLORED BY MODEL)
     st.markdown('<div class="section-header">HOSPITALIZATION FORECASTS BY HORIZON</div>', unsafe_allow_html=True)
-    
-    # Create the visualization
-    fig = go.Figure()
-    
-    if len(df_horizon) > 0:
-        # Get model color
-        model_color = MODEL_COLORS.get(selected_model, '#808080')
-        # Convert hex to RGB for transparency
-        r = int(model_color[1:3], 16)
-        g = int(model_color[3:5], 16)
-        b = int(model_color[5:7], 16)
-        
-        # Get all unique reference dates
-        reference_dates = sorted(df_horizon['reference_date'].unique())
-        
-        # For each reference date, create boxes for the 95% CI
-        for ref_date in reference_dates:  # Show last 20 forecast dates
-            df_ref = df_horizon[df_horizon['reference_date'] == ref_date]
-            
-            # Pivot to get quantiles by target date
-            pivot_df = df_ref.pivot_table(
-                index='target_end_date',
-                columns='output_type_id',
-                values='value',
-                aggfunc='first'
-            ).reset_index()
-            
-            if len(pivot_df) == 0:
-                continue
-            
-            # Check if we have the needed quantiles for 95% CI
-            if 0.025 in pivot_df.columns and 0.975 in pivot_df.columns and 0.5 in pivot_df.columns:
-                # Calculate days since reference for opacity
-                days_old = (reference_dates[-1] - ref_date).days
-                opacity = 0.4#max(0.2, min(0.6, 1 - (days_old / 60)))
-                
-                # Color based on model with recency-based opacity
-                box_color = f'rgba({r}, {g}, {b}, {opacity * 0.4})'
-                line_color = f'rgba({r}, {g}, {b}, {opacity + 0.2})'
-                
-                for idx, row in pivot_df.iterrows():
-                    target_date = row['target_end_date']
-                    lower_95 = row[0.025]
-                    upper_95 = row[0.975]
-                    median = row[0.5]
-                    
-                    # Add rectangle for 95% CI
-                    fig.add_shape(
-                        type="rect",
-                        x0=target_date - timedelta(days=2),
-                        x1=target_date + timedelta(days=2),
-                        y0=lower_95,
-                        y1=upper_95,
-                        fillcolor=box_color,
-                        line=dict(color=line_color, width=1),
-                        layer="below"
-                    )
-                    
-                    # Add median line
-                    fig.add_trace(go.Scatter(
-                        x=[target_date - timedelta(days=2), target_date + timedelta(days=2)],
-                        y=[median, median],
-                        mode='lines',
-                        line=dict(color='black', width=1),
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
-    
-    # Add observed data as dots
-    fig.add_trace(go.Scatter(
-        x=df_state_target['date'],
-        y=df_state_target['value'],
-        mode='markers',
-        name='Observed',
-        marker=dict(
-            color='white',
-            size=8,
-            symbol='circle',
-            line=dict(color='black', width=2)
-        ),
-        hovertemplate='<b>Observed</b><br>Date: %{x|%b %d}<br>Value: %{y:,.0f}<extra></extra>'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=f"95% Confidence Intervals - Horizon {selected_horizon}",
-        xaxis_title="Target Date",
-        yaxis_title="Weekly Hospitalizations",
-        template=COLORS['plotly_template'],
-        height=500,
-        showlegend=True,
-        paper_bgcolor=COLORS['plotly_bg'],
-        plot_bgcolor=COLORS['plotly_bg'],
-        hovermode='x unified'
-    )
-    
-    # Format axes
-    fig.update_xaxes(
-        tickformat="%b %d",
-        showgrid=True,
-        gridwidth=0.5,
-        gridcolor=COLORS['plotly_grid']
-    )
-    
-    fig.update_yaxes(
-        tickformat=',',
-        showgrid=True,
-        gridwidth=0.5,
-        gridcolor=COLORS['plotly_grid'],
-        rangemode='tozero'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True, 'displaylogo': False})
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True, 'displaylogo': False})
     
     # 2 Main visualization - Simple 95% CI Boxes (COLORED BY MODEL)
     st.markdown('<div class="section-header">Score FORECASTS BY HORIZON</div>', unsafe_allow_html=True)
+    with span("plotly_chart"):
+        st.plotly_chart(fig_score, use_container_width=True, config={'displayModeBar': True, 'displaylogo': False})
     
-    # Create the visualization
-    fig_score = go.Figure()
-
-    # Add observed data as dots
-    fig_score.add_trace(go.Scatter(
-        x=df_horizon_score['target_end_date'],
-        y=df_horizon_score['value'],
-        name='Score',
-        line=dict(color=model_color, width=3),  # controls the line
-        marker=dict(
-            color=model_color,
-            size=8,
-            symbol='circle',
-            line=dict(color=model_color, width=7)
-        ),
-        hovertemplate='skip'
-    ))
-
-
-        # Update layout
-    fig_score.update_layout(
-        title=f"{selected_score} by horizon",
-        xaxis_title="Target Date",
-        yaxis_title=f"{selected_score}",
-        template=COLORS['plotly_template'],
-        height=500,
-        showlegend=True,
-        paper_bgcolor=COLORS['plotly_bg'],
-        plot_bgcolor=COLORS['plotly_bg'],
-        hovermode='x unified'
-    )
-    
-    # Format axes
-    fig_score.update_xaxes(
-        tickformat="%b %d",
-        showgrid=True,
-        gridwidth=0.5,
-        gridcolor=COLORS['plotly_grid'],
-        range = [df_target_data.date.min(),df_horizon.target_end_date.max()]
-    )
-    
-    fig_score.update_yaxes(
-        tickformat=',',
-        showgrid=True,
-        gridwidth=0.5,
-        gridcolor=COLORS['plotly_grid'],
-        rangemode='tozero'
+    # Calibration over every reference date, read from the precomputed calibration cube
+    st.markdown('<div class="section-header">CALIBRATION</div>', unsafe_allow_html=True)
+    level = st.radio(
+        "Interval",
+        COVERAGE_LEVELS,
+        index=COVERAGE_LEVELS.index(0.95),
+        format_func=lambda l: f"{l:.0%}",
+        horizontal=True,
+        key="calibration_level"
     )
+    figure_key = ("Calibration", location_id, (selected_model,), None, selected_horizon, level, st.session_state.theme)
+    with span("figure"):
+        fig_curve, fig_pit, fig_heatmap = figure_cache().get_or_build(figure_key, lambda: build_calibration_figures(
+            calibration, location_id, selected_model, selected_horizon, level, COLORS,
+            location_names=dict(zip(locations.location, locations.location_name))
+        ))
     
-    st.plotly_chart(fig_score, use_container_width=True, config={'displayModeBar': True, 'displaylogo': False})
+    col1, col2 = st.columns(2)
+    with col1, span("plotly_chart"):
+        st.plotly_chart(fig_curve, use_container_width=True, config={'displayModeBar': False})
+    with col2, span("plotly_chart"):
+        st.plotly_chart(fig_pit, use_container_width=True, config={'displayModeBar': False})
+    with span("plotly_chart"):
+        st.plotly_chart(fig_heatmap, use_container_width=True, config={'displayModeBar': False})
+
+# ============================================================================
+# TIMING
+# ============================================================================
+
+# JSON-lines file that receives one timing record per rerun, if set
+TIMING_LOG = os.environ.get("TIMING_LOG")
+
+
+def timing_panel_enabled():
+    """Debug panel is opt-in with ?debug=1 or DASHBOARD_DEBUG=1"""
+    return os.environ.get("DASHBOARD_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+
+def report_timing(records, total, show_panel):
+    """Write this rerun's spans to TIMING_LOG and/or the sidebar debug panel"""
+    record = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "page": st.session_state.current_page,
+        "total_s": total,
+        "rss_bytes": process_rss(),
+        "figure_cache": figure_cache().stats(),
+        "spans": records,
+    }
+    if TIMING_LOG:
+        append_jsonl(TIMING_LOG, record)
+    if show_panel:
+        records = sorted(records, key=lambda r: r["start"])
+        with st.sidebar.expander("⏱ Timing", expanded=True):
+            st.caption(f"Rerun {total * 1000:.1f} ms · RSS {record['rss_bytes'] / 1e6:,.0f} MB · "
+                       f"figure cache hit rate {record['figure_cache']['hit_rate']:.0%}")
+            st.dataframe(pd.DataFrame({
+                "stage": ["\u2003" * r["depth"] + r["name"] for r in records],
+                "ms": [r["seconds"] * 1000 for r in records],
+            }), hide_index=True, use_container_width=True)
+
 
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
 
+# Spans cost nothing unless this rerun is recording
+show_timing = timing_panel_enabled()
+if show_timing or TIMING_LOG:
+    start_recording()
+    rerun_start = time.perf_counter()
+else:
+    stop_recording()
+
 # Apply theme
 apply_theme_styles()
 
+# Geometry loads on the first map draw; PRELOAD_GEOMETRY=1 loads it at startup instead
+if os.environ.get("PRELOAD_GEOMETRY") == "1":
+    load_state_geometry()
+
 # Load data
-usa_gpd, locations, df_forecasts, df_target_data, models,df_scores,scores = load_data()
+with span("load_data"):
+    locations, scores = load_data()
+    # Their data loads when first selected
+    models = load_models()
 
 # Create navigation at the top
 create_navigation()
 
+# The sidebar picks the models, so the snapshot is loaded after it
+if st.session_state.current_page == "Evaluations":
+    selected_state, selected_models,selected_score = create_sidebar_evals(models, is_evaluations_page=True)
+else:
+    selected_state, selected_models = create_sidebar(models, is_evaluations_page=False)
+with span("load_snapshot"):
+    snapshot = load_snapshot(selected_models, locations)
+forecast_cube, df_target_data = snapshot.cube, snapshot.df_target_data
+
 # Display the appropriate page
 if st.session_state.current_page == "Dashboard":
-    selected_state, selected_models = create_sidebar(models, is_evaluations_page=False)
-    dashboard_page(selected_state, selected_models, locations, df_forecasts, df_target_data, models)
+    with span("ensembles"):
+        ensemble = load_ensemble(snapshot.version, st.session_state.ensemble_method, frozenset(selected_models),
+                                 snapshot, locations)
+    dashboard_page(selected_state, selected_models, locations, forecast_cube, df_target_data, models, ensemble)
+elif st.session_state.current_page == "Overview":
+    with span("ensembles"):
+        ensemble = load_ensemble(snapshot.version, st.session_state.ensemble_method, frozenset(selected_models),
+                                 snapshot, locations)
+    overview_page(selected_state, selected_models, locations, forecast_cube, ensemble)
 else:
-    selected_state, selected_models,selected_score = create_sidebar_evals(models, is_evaluations_page=True)
-    evaluations_page(selected_state, selected_models,selected_score, locations, df_forecasts, df_target_data,df_scores)
\ No newline at end of file
+    with span("load_scores"):
+        df_scores = snapshot.scores()
+    with span("load_calibration"):
+        calibration = snapshot.calibration()
+    evaluations_page(selected_state, selected_models,selected_score, locations, forecast_cube, df_target_data,df_scores, calibration)
+
+if show_timing or TIMING_LOG:
+    report_timing(stop_recording(), time.perf_counter() - rerun_start, show_timing)
\ No newline at end of file
@@ -0,0 +1,287 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast_store import MANIFEST_PATH, diff_manifests, parse_forecast_path, read_manifest, store_lock
+from timing import span
+
+
+SCORES = ['WIS', 'WIS_ratio', 'MAPE']
+SCORE_CACHE_DIR = "store/scores"
+
+
+def observed_matrix(df_target_data):
+    """Observations as a (date x location) array plus its date and location axes"""
+    with span("pivot_table", rows=len(df_target_data)):
+        wide = df_target_data.pivot_table(index='date', columns='location', values='value', aggfunc='first')
+    return wide.index, list(wide.columns), wide.to_numpy(dtype=float)
+
+
+def lookup_observed(df_target_data, dates, locations):
+    """Observed values at an array of dates for each location (NaN where missing).
+
+    Returns an array of shape dates.shape + (len(locations),).
+    """
+    obs_dates, obs_locations, obs = observed_matrix(df_target_data)
+    dates = pd.DatetimeIndex(np.ravel(dates))
+    rows = obs_dates.get_indexer(dates)
+    cols = pd.Index(obs_locations).get_indexer(locations)
+
+    # Pad with a NaN row/column so missing dates and locations index into it
+    padded = np.full((obs.shape[0] + 1, obs.shape[1] + 1), np.nan)
+    padded[:-1, :-1] = obs
+    values = padded[rows[:, None], cols[None, :]]
+    return values.reshape(np.shape(dates) + (len(locations),))
+
+
+def observed_for_cube(cube, df_target_data):
+    """Observed value for every (reference_date, location, horizon) task in the cube"""
+    horizon_offsets = pd.to_timedelta(7 * cube.horizons.astype(int), unit="D")
+    target_dates = cube.reference_dates.values[:, None] + horizon_offsets.values[None, :]
+    observed = lookup_observed(df_target_data, target_dates.ravel(), cube.locations)
+    observed = observed.reshape(len(cube.reference_dates), len(cube.horizons), len(cube.locations))
+    return observed.transpose(0, 2, 1)
+
+
+def weighted_interval_score(quantile_values, quantile_levels, observed):
+    """WIS of quantile forecasts, vectorized over any leading dimensions.
+
+    quantile_values has the quantile levels on its last axis and observed
+    broadcasts against the remaining axes. Uses the quantile (pinball) loss
+    form of WIS, which equals the interval-score definition for a symmetric
+    set of levels that includes the median. Tasks with any missing quantile
+    score NaN.
+    """
+    levels = np.asarray(quantile_levels, dtype=float)
+    y = np.asarray(observed, dtype=float)[..., None]
+    q = np.asarray(quantile_values, dtype=float)
+    pinball = ((y < q) - levels) * (q - y)
+    return pinball.sum(axis=-1) * 2 / len(levels)
+
+
+def quantile_cdf(quantile_values, quantile_levels, x, side="left"):
+    """CDF of quantile forecasts at x, vectorized over any leading dimensions.
+
+    quantile_values has ascending levels on its last axis and x broadcasts
+    against the remaining axes. The CDF is interpolated linearly between
+    the bracketing quantiles and is 0 or 1 outside the outermost ones.
+    side="left" gives P(Y < x) and side="right" P(Y <= x), which differ
+    where several quantiles equal x.
+    """
+    levels = np.asarray(quantile_levels, dtype=float)
+    n = len(levels)
+    x = np.asarray(x, dtype=float)
+    below = (quantile_values < x[..., None] if side == "left" else quantile_values <= x[..., None]).sum(axis=-1)
+    lo, hi = np.clip(below - 1, 0, n - 1), np.clip(below, 0, n - 1)
+    v_lo = np.take_along_axis(quantile_values, lo[..., None], axis=-1)[..., 0]
+    v_hi = np.take_along_axis(quantile_values, hi[..., None], axis=-1)[..., 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(v_hi > v_lo, (x - v_lo) / (v_hi - v_lo), 0)
+    cdf = levels[lo] + frac * (levels[hi] - levels[lo])
+    return np.where(below == 0, 0, np.where(below == n, 1, cdf))
+
+
+def absolute_percentage_error(median, observed):
+    """|observed - median| / observed in percent (NaN where observed is 0)"""
+    observed = np.asarray(observed, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.abs(observed - median) / np.abs(observed) * 100
+    return np.where(observed == 0, np.nan, ape)
+
+
+def baseline_quantiles(cube, df_target_data):
+    """Flat baseline forecasts for every (reference_date, location, horizon).
+
+    Follows the FluSight baseline: the median is the latest observation
+    (target_end_date of horizon -1), and the spread comes from the quantiles
+    of symmetrized one-week changes seen up to that point, widened by
+    sqrt(horizon + 1) for later horizons and truncated at zero.
+    """
+    obs_dates, obs_locations, obs = observed_matrix(df_target_data)
+    cols = pd.Index(obs_locations).get_indexer(cube.locations)
+    obs = np.where(cols[None, :] >= 0, obs[:, cols], np.nan)
+
+    diffs = np.diff(obs, axis=0)
+    levels = cube.quantiles
+    n_dates, n_locs = len(cube.reference_dates), len(cube.locations)
+    last = lookup_observed(df_target_data, cube.reference_dates - pd.Timedelta(days=7), cube.locations)
+    spread = np.full((n_dates, n_locs, len(levels)), np.nan)
+
+    for i, ref_date in enumerate(cube.reference_dates):
+        # Changes whose later observation is known at the reference date
+        known = np.searchsorted(obs_dates, ref_date - pd.Timedelta(days=7), side="right") - 1
+        past = diffs[:max(known, 0)]
+        symmetric = np.concatenate([past, -past], axis=0)
+        spread[i] = np.nanquantile(symmetric, levels, axis=0).T if len(symmetric) else np.nan
+
+    scale = np.sqrt(np.maximum(cube.horizons.astype(float), 0) + 1)
+    quantiles = last[:, :, None, None] + spread[:, :, None, :] * scale[None, None, :, None]
+    return np.maximum(quantiles, 0)
+
+
+def score_forecasts(cube, df_target_data, tasks=None):
+    """Score every forecast in the cube against the surveillance data.
+
+    Returns the long df_scores table used by the Evaluations page
+    (Model, location, reference_date, horizon, target_end_date, value, score)
+    with one row per scored task and score. tasks is an optional boolean
+    model x reference_date x location x horizon mask limiting the output.
+    """
+    observed = observed_for_cube(cube, df_target_data)          # R x L x H
+    values = cube.values                                        # M x R x L x H x Q
+    median = values[..., cube.index["quantile"][0.5]]
+
+    wis = weighted_interval_score(values, cube.quantiles, observed[None])
+    baseline_wis = weighted_interval_score(baseline_quantiles(cube, df_target_data), cube.quantiles, observed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wis_ratio = np.where(baseline_wis[None] > 0, wis / baseline_wis[None], np.nan)
+    mape = absolute_percentage_error(median, observed[None])
+
+    keep = np.ones(wis.shape, dtype=bool) if tasks is None else tasks
+    m, r, loc, h = np.nonzero(keep)
+    reference_dates = cube.reference_dates[r]
+    horizons = cube.horizons[h]
+    rows = pd.DataFrame({
+        'Model': np.asarray(cube.models, dtype=object)[m],
+        'location': np.asarray(cube.locations, dtype=object)[loc],
+        'reference_date': reference_dates,
+        'horizon': horizons,
+        'target_end_date': reference_dates + pd.to_timedelta(7 * horizons.astype(int), unit="D"),
+    })
+
+    df_scores = pd.concat([
+        rows.assign(value=score[keep], score=name)
+        for name, score in [('WIS', wis), ('WIS_ratio', wis_ratio), ('MAPE', mape)]
+    ], ignore_index=True)
+    return df_scores[df_scores['value'].notna()].reset_index(drop=True)
+
+
+# ============================================================================
+# INCREMENTAL SCORE CACHE
+# ============================================================================
+
+def read_score_cache(cache_dir=SCORE_CACHE_DIR):
+    """Cached scores, the observations and forecast manifest they were computed from"""
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    df_scores = pd.read_parquet(os.path.join(cache_dir, "scores.parquet"))
+    observed = pd.read_parquet(os.path.join(cache_dir, "observed.parquet"))
+    meta["pairs"] = {(model, pd.Timestamp(date)) for model, date in meta["pairs"]}
+    return df_scores, observed, meta
+
+
+def write_score_cache(df_scores, observed, manifest, pairs, cache_dir=SCORE_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    # Each file goes through a per-process temp name so a reader never sees a partial one
+    for name, df in (("scores.parquet", df_scores), ("observed.parquet", observed)):
+        tmp_path = os.path.join(cache_dir, f"{name}.{os.getpid()}")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+    meta = {
+        "manifest": manifest,
+        "pairs": sorted([model, date.strftime("%Y-%m-%d")] for model, date in pairs),
+    }
+    tmp_path = os.path.join(cache_dir, f"meta.json.{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+
+
+def forecast_pairs(cube):
+    """(model, reference_date) pairs that have forecasts in the cube"""
+    present = ~np.isnan(cube.values).all(axis=(2, 3, 4))
+    return {(cube.models[m], cube.reference_dates[r]) for m, r in zip(*np.nonzero(present))}
+
+
+def changed_observations(old, new):
+    """(location, date) rows whose observed value was added, revised or removed"""
+    merged = old.merge(new, on=['location', 'date'], how='outer', suffixes=('_old', '_new'))
+    same = (merged['value_old'] == merged['value_new']) | (merged['value_old'].isna() & merged['value_new'].isna())
+    return merged.loc[~same, ['location', 'date']]
+
+
+def affected_tasks(cube, cached_pairs, forecast_changes, observation_changes):
+    """Boolean model x reference_date x location x horizon mask of tasks to re-score.
+
+    A task is affected when its forecast file is new or changed, or when an
+    observation it depends on changed: the value at its target_end_date, or
+    any value up to its reference date through the baseline used by WIS_ratio.
+    """
+    mask = np.zeros(cube.values.shape[:4], dtype=bool)
+
+    for model, reference_date in forecast_pairs(cube) - cached_pairs:
+        mask[cube.index["model"][model], cube.index["reference_date"][reference_date]] = True
+    for path in forecast_changes["added"] + forecast_changes["replaced"]:
+        reference_date, model = parse_forecast_path(path)
+        m = cube.position("model", model)
+        r = cube.position("reference_date", reference_date)
+        if m is not None and r is not None:
+            mask[m, r] = True
+
+    target_dates = cube.reference_dates.values[:, None] + pd.to_timedelta(7 * cube.horizons.astype(int), unit="D").values[None, :]
+    last_dates = (cube.reference_dates - pd.Timedelta(days=7)).values
+    for location, date in observation_changes.itertuples(index=False):
+        loc = cube.position("location", location)
+        if loc is None:
+            continue
+        date = np.datetime64(date)
+        r, h = np.nonzero(target_dates == date)
+        mask[:, r, loc, h] = True
+        mask[:, last_dates >= date, loc, :] = True
+
+    return mask
+
+
+def update_scores(cube, df_target_data, cache_dir=SCORE_CACHE_DIR, manifest_path=MANIFEST_PATH):
+    """Return df_scores for the cube, re-scoring only tasks whose inputs changed.
+
+    Scores persist in cache_dir together with the surveillance snapshot and
+    forecast manifest they were computed from; the next call diffs against
+    those to find the affected tasks.
+    """
+    # The cache is shared by every process scoring against this store; the lock
+    # covers reading and writing it, not the scoring in between
+    with store_lock(manifest_path):
+        manifest = read_manifest(manifest_path)
+        cached = read_score_cache(cache_dir)
+    observed = df_target_data[['location', 'date', 'value']].reset_index(drop=True)
+    pairs = forecast_pairs(cube)
+
+    if cached is None:
+        df_scores = score_forecasts(cube, df_target_data)
+    else:
+        cached_scores, cached_observed, meta = cached
+        mask = affected_tasks(
+            cube,
+            meta["pairs"],
+            diff_manifests(meta["manifest"], manifest),
+            changed_observations(cached_observed, observed),
+        )
+
+        # Drop cached rows that are affected or no longer in the cube
+        m = cached_scores['Model'].map(cube.index["model"])
+        r = cached_scores['reference_date'].map(cube.index["reference_date"])
+        loc = cached_scores['location'].map(cube.index["location"])
+        h = cached_scores['horizon'].map(cube.index["horizon"])
+        in_cube = (m.notna() & r.notna() & loc.notna() & h.notna()).to_numpy()
+        positions = [p[in_cube].astype(int).to_numpy() for p in (m, r, loc, h)]
+        keep = in_cube.copy()
+        keep[in_cube] = ~mask[tuple(positions)]
+        parts = [cached_scores[keep]]
+
+        # Re-score the smallest sub-cube that covers the affected tasks
+        dates = mask.any(axis=(0, 2, 3))
+        locs = mask.any(axis=(0, 1, 3))
+        if dates.any():
+            sub_cube = cube.subset(reference_dates=dates, locations=locs)
+            parts.append(score_forecasts(sub_cube, df_target_data, tasks=mask[:, dates][:, :, locs]))
+        df_scores = pd.concat(parts, ignore_index=True)
+
+    with store_lock(manifest_path):
+        write_score_cache(df_scores, observed, manifest, pairs, cache_dir)
+    return df_scores
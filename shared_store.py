@@ -0,0 +1,397 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from activity import activity_index, location_thresholds
+from calibration import CalibrationCube, build_calibration
+from forecast_cube import ForecastCube, build_cube
+from forecast_store import (LOCATIONS_PATH, QUARANTINE_PATH, TARGET_PATH, TARGET_START_DATE, compact_forecasts,
+                            file_stamp, has_changes, load_forecasts, merge_forecasts, parse_forecast_path,
+                            read_target_data, store_lock, sync_store)
+from scoring import changed_observations, update_scores
+from timing import span
+
+
+SNAPSHOT_DIR = "store/snapshots"
+
+# Published versions kept on disk; older ones may still be mapped by a slow reader
+KEEP_VERSIONS = 3
+
+# Seconds between the watcher's checks of the hub files; override with WATCH_INTERVAL
+WATCH_INTERVAL = float(os.environ.get("WATCH_INTERVAL", 30))
+
+
+def write_arrow(df, path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_arrow(path):
+    """DataFrame over a memory-mapped Arrow IPC file (numeric columns are not copied)"""
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def read_current_version(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(cube, df_target_all, meta, snapshot_dir=SNAPSHOT_DIR):
+    """Write a new snapshot version; returns the version.
+
+    Files are written into a private directory that is renamed into place,
+    so readers in any process only ever see complete versions. Readers only
+    move to it once set_current() points CURRENT at it.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix="tmp-", dir=snapshot_dir)
+    np.save(os.path.join(tmp_dir, "values.npy"), cube.values)
+    np.save(os.path.join(tmp_dir, "summary.npy"), cube.summary)
+    if cube.activity is not None:
+        np.save(os.path.join(tmp_dir, "activity.npy"), cube.activity)
+    axes = {
+        "models": list(cube.models),
+        "reference_dates": [d.strftime("%Y-%m-%d") for d in cube.reference_dates],
+        "locations": list(cube.locations),
+        "horizons": cube.horizons.astype(int).tolist(),
+        "quantiles": cube.quantiles.tolist(),
+    }
+    with open(os.path.join(tmp_dir, "axes.json"), "w") as f:
+        json.dump(axes, f)
+    write_arrow(df_target_all, os.path.join(tmp_dir, "target.arrow"))
+
+    # Versions are numbered; another process may claim a number first
+    existing = [int(name[1:]) for name in os.listdir(snapshot_dir) if name.startswith("v") and name[1:].isdigit()]
+    number = max(existing, default=0) + 1
+    while True:
+        version = f"v{number:06d}"
+        meta = dict(meta, version=version, created=datetime.now().isoformat(timespec="seconds"))
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp_dir, os.path.join(snapshot_dir, version))
+            break
+        except OSError:
+            number += 1
+    return version
+
+
+def set_current(version, snapshot_dir=SNAPSHOT_DIR):
+    tmp_path = os.path.join(snapshot_dir, f"CURRENT.{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(snapshot_dir, "CURRENT"))
+
+
+def prune_snapshots(snapshot_dir=SNAPSHOT_DIR, keep=KEEP_VERSIONS):
+    """Delete all but the newest keep versions (open mappings stay valid on POSIX)"""
+    versions = sorted(name for name in os.listdir(snapshot_dir) if name.startswith("v") and name[1:].isdigit())
+    for version in versions[:-keep]:
+        shutil.rmtree(os.path.join(snapshot_dir, version), ignore_errors=True)
+
+
+class Snapshot:
+    """One immutable version of the loaded data.
+
+    The cube arrays are read-only memory maps of the version's .npy files,
+    so every process serving the same version shares the same pages.
+    Scores are computed on first use and saved into the version for the
+    other processes.
+    """
+
+    def __init__(self, version, path):
+        self.version = version
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "axes.json")) as f:
+            axes = json.load(f)
+        self.cube = ForecastCube(
+            np.load(os.path.join(path, "values.npy"), mmap_mode="r"),
+            models=axes["models"],
+            reference_dates=pd.to_datetime(axes["reference_dates"]),
+            locations=axes["locations"],
+            horizons=axes["horizons"],
+            quantiles=axes["quantiles"],
+        )
+        self.cube.summary = np.load(os.path.join(path, "summary.npy"), mmap_mode="r")
+        if os.path.exists(os.path.join(path, "activity.npy")):
+            self.cube.activity = np.load(os.path.join(path, "activity.npy"), mmap_mode="r")
+        self.df_target_all = read_arrow(os.path.join(path, "target.arrow"))
+        # Observations shown by the pages
+        self.df_target_data = self.df_target_all[self.df_target_all.date >= pd.to_datetime(TARGET_START_DATE)]
+        self._scores = None
+        self._scores_lock = threading.Lock()
+        self._calibration = None
+        self._calibration_lock = threading.Lock()
+
+    def scores(self):
+        """df_scores for this version, computed once across all processes"""
+        with self._scores_lock:
+            if self._scores is None:
+                path = os.path.join(self.path, "scores.arrow")
+                if os.path.exists(path):
+                    self._scores = read_arrow(path)
+                else:
+                    self._scores = update_scores(self.cube, self.df_target_all)
+                    try:
+                        tmp_path = f"{path}.{os.getpid()}"
+                        write_arrow(self._scores, tmp_path)
+                        os.replace(tmp_path, path)
+                    except OSError:
+                        # The version was pruned meanwhile; the scores are still valid here
+                        pass
+            return self._scores
+
+    def calibration(self):
+        """CalibrationCube for this version, computed once across all processes like scores()"""
+        with self._calibration_lock:
+            if self._calibration is None:
+                path = os.path.join(self.path, "calibration.npy")
+                if os.path.exists(path):
+                    self._calibration = CalibrationCube(np.load(path, mmap_mode="r"), self.cube)
+                else:
+                    self._calibration = build_calibration(self.cube, self.df_target_all)
+                    try:
+                        tmp_path = f"{path}.{os.getpid()}.npy"
+                        np.save(tmp_path, self._calibration.values)
+                        os.replace(tmp_path, path)
+                    except OSError:
+                        # The version was pruned meanwhile; the values are still valid here
+                        pass
+            return self._calibration
+
+
+class SharedStore:
+    """Holds the current Snapshot for every session in a process.
+
+    A rerun takes one snapshot from current() and reads only from it, so a
+    reload never changes data under a running page. publish() writes a new
+    version and swaps the reference; current() picks up versions published
+    by other processes.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    def current(self):
+        version = read_current_version(self.snapshot_dir)
+        snapshot = self.snapshot
+        if version is None or (snapshot is not None and snapshot.version == version):
+            return snapshot
+        with self.lock:
+            if self.snapshot is None or self.snapshot.version != version:
+                self.snapshot = Snapshot(version, os.path.join(self.snapshot_dir, version))
+            return self.snapshot
+
+    def publish(self, cube, df_target_all, meta):
+        """Write a new version and make it current.
+
+        The version is written before the lock is taken, so current() in
+        other sessions only waits for the swap.
+        """
+        version = write_snapshot(cube, df_target_all, meta, self.snapshot_dir)
+        snapshot = Snapshot(version, os.path.join(self.snapshot_dir, version))
+        with self.lock:
+            set_current(version, self.snapshot_dir)
+            self.snapshot = snapshot
+            prune_snapshots(self.snapshot_dir)
+            return self.snapshot
+
+
+def touched_data(changes, df_target_old, df_target_new):
+    """The (model, reference_date) forecasts and the locations whose observations a refresh changed"""
+    forecasts = sorted({parse_forecast_path(path)[::-1] for kind in ("added", "replaced", "removed")
+                        for path in changes[kind]})
+    columns = ['location', 'date', 'value']
+    if df_target_old is None:
+        locations = sorted(df_target_new.location.unique())
+    else:
+        locations = sorted(changed_observations(df_target_old[columns], df_target_new[columns]).location.unique())
+    return {"forecasts": [[model, date] for model, date in forecasts], "locations": locations}
+
+
+class SnapshotWatcher:
+    """Keeps a SharedStore up to date from a background thread.
+
+    Every interval seconds the thread syncs the forecast store and checks
+    the target file. When something changed it merges only the changed
+    partitions into this process's forecast table, rebuilds the cube and
+    publishes the new version, then computes its scores and calibration
+    outside the locks. Sessions read the previous snapshot until the swap
+    and never wait on ingestion; one that needs scores before the thread
+    is done waits only for them.
+
+    Models are loaded lazily: the snapshot holds the active models, which
+    start as models and grow as sessions select others through
+    snapshot_for(). A newly selected model's partitions are read and added
+    to the table once, and then stay for every session.
+
+    on_change(touched) runs once per new version, including versions
+    published by other processes. touched is touched_data() for the change,
+    or None when it is unknown and every cache should be dropped.
+    """
+
+    def __init__(self, store, models, locations, start_date, interval=WATCH_INTERVAL, on_change=None):
+        self.store = store
+        # Active models, and the ones this process's forecast table holds
+        self.models = sorted(models)
+        self.table_models = []
+        self.locations = locations
+        self.start_date = start_date
+        self.interval = interval
+        self.on_change = on_change
+        # This process's long forecast table and the version it was built for
+        self.df = None
+        self.table_version = None
+        # Last version on_change ran for
+        self.seen_version = None
+        self.refresh_lock = threading.Lock()
+        self.seen_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.last_error = None
+
+    def inputs(self):
+        return {"models": self.models, "start_date": self.start_date,
+                "locations_stamp": list(file_stamp(LOCATIONS_PATH))}
+
+    def same_data(self, snapshot):
+        """Whether snapshot was built from this app's start date and locations"""
+        inputs = self.inputs()
+        return snapshot is not None and all(snapshot.meta.get(k) == inputs[k] for k in ("start_date", "locations_stamp"))
+
+    def matches(self, snapshot, models=None):
+        """Whether snapshot has this app's start date and locations and holds models (default: every active one)"""
+        models = self.models if models is None else models
+        return self.same_data(snapshot) and set(models) <= set(snapshot.meta["models"])
+
+    def snapshot_for(self, models):
+        """The current snapshot, first loading any of models it does not hold yet"""
+        snapshot = self.current()
+        if not self.matches(snapshot, models):
+            snapshot = self.refresh(models)
+        return snapshot
+
+    def current(self):
+        """The current snapshot, noting versions published since the last call"""
+        snapshot = self.store.current()
+        if snapshot is not None and snapshot.version != self.seen_version:
+            self.seen(snapshot)
+        return snapshot
+
+    def seen(self, snapshot):
+        with self.seen_lock:
+            if snapshot.version == self.seen_version:
+                return
+            known = self.seen_version is not None and snapshot.meta.get("previous") == self.seen_version
+            self.seen_version = snapshot.version
+            if self.on_change is not None:
+                self.on_change(snapshot.meta.get("touched") if known else None)
+
+    def refresh(self, models=(), precompute=False):
+        """Sync the hub files and publish a new version if they changed; returns the current snapshot.
+
+        models are added to the active ones first, which also publishes a
+        new version when any of them was not loaded yet. precompute scores
+        and calibrates a newly published version once the locks are
+        released, so a request-path refresh never waits on it; the
+        background thread does, while builds on the request path leave both
+        to first use so a page is not held up by scoring.
+        """
+        # Sync, load and publish run under the store lock shared with the other processes
+        with self.refresh_lock, store_lock():
+            with span("sync_store"):
+                changes = sync_store()
+            if changes["quarantined"]:
+                print(f"Quarantined {len(changes['quarantined'])} hub files (kept out of the store, see "
+                      f"{QUARANTINE_PATH}): {', '.join(changes['quarantined'])}", file=sys.stderr)
+            snapshot = self.current()
+            if snapshot is not None and snapshot.version != self.table_version:
+                # Another process published since this table was built: it is behind
+                self.df = None
+            same_data = self.same_data(snapshot)
+            if same_data:
+                # Keep the models sessions in other processes already loaded
+                self.models = sorted(set(self.models) | set(snapshot.meta["models"]))
+            self.models = sorted(set(self.models) | set(models))
+            meta = dict(self.inputs(), target_stamp=list(file_stamp(TARGET_PATH)))
+
+            forecasts_changed = not self.matches(snapshot) or has_changes(changes)
+            if not forecasts_changed and snapshot.meta["target_stamp"] == meta["target_stamp"]:
+                return snapshot
+
+            cube = None if snapshot is None else snapshot.cube
+            if forecasts_changed:
+                if self.df is None:
+                    with span("load_forecasts", models=len(self.models)):
+                        self.df = load_forecasts(models=self.models, start_date=self.start_date)
+                else:
+                    if has_changes(changes):
+                        with span("merge_forecasts"):
+                            self.df = merge_forecasts(self.df, changes, models=self.table_models,
+                                                      start_date=self.start_date)
+                    added = [model for model in self.models if model not in self.table_models]
+                    if added:
+                        # Only the newly selected models' partitions are read
+                        with span("load_forecasts", models=len(added)):
+                            df_added = load_forecasts(models=added, start_date=self.start_date)
+                            self.df = compact_forecasts(pd.concat([self.df, df_added], ignore_index=True))
+                self.table_models = list(self.models)
+                with span("build_cube"):
+                    cube = build_cube(self.df)
+                with span("activity_index"):
+                    cube.activity = activity_index(cube, location_thresholds(self.locations, cube.locations))
+            df_target_all = read_target_data()
+
+            if same_data:
+                # Added models cannot have cached figures yet, so only the file changes are stale
+                meta["previous"] = snapshot.version
+                meta["touched"] = touched_data(changes, snapshot.df_target_all, df_target_all)
+            with span("publish_snapshot"):
+                snapshot = self.store.publish(cube, df_target_all, meta)
+            self.table_version = snapshot.version
+            self.seen(snapshot)
+
+        if precompute:
+            # The version is immutable, so it is scored without holding up other refreshes
+            with span("precompute"):
+                snapshot.scores()
+                snapshot.calibration()
+        return snapshot
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.refresh(precompute=True)
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the last good snapshot and try again next interval
+                self.last_error = e
+                traceback.print_exc(file=sys.stderr)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="snapshot-watcher", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import threading
+import time
+
+
+_local = threading.local()
+
+
+class _NullSpan:
+    """Shared no-op span returned while nothing is recording"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, records, name, attrs):
+        self.records = records
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.depth = getattr(_local, "depth", 0)
+        _local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _local.depth = self.depth
+        self.records.append({
+            "name": self.name,
+            "start": self.start - _local.origin,
+            "seconds": elapsed,
+            "depth": self.depth,
+            **self.attrs,
+        })
+        return False
+
+
+def start_recording():
+    """Collect spans opened on this thread into a fresh list, which is returned"""
+    _local.records = []
+    _local.depth = 0
+    _local.origin = time.perf_counter()
+    return _local.records
+
+
+def stop_recording():
+    """Stop collecting spans on this thread and return what was recorded"""
+    records = getattr(_local, "records", None)
+    _local.records = None
+    return records or []
+
+
+def span(name, **attrs):
+    """Time a block of work when this thread is recording, otherwise do nothing.
+
+        with span("load_forecasts", models=3):
+            ...
+    """
+    records = getattr(_local, "records", None)
+    if records is None:
+        return NULL_SPAN
+    return _Span(records, name, attrs)
+
+
+def process_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+_log_lock = threading.Lock()
+
+
+def append_jsonl(path, record):
+    """Append one record to a JSON-lines log, safe across the app's script threads"""
+    line = json.dumps(record, default=str)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _log_lock, open(path, "a") as f:
+        f.write(line + "\n")